@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import functools
+from pathlib import Path
+
+import httpx
+
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+# httpx copies the header list of a Headers instance without re-normalizing
+# it, so one shared instance is both safe and cheaper than a dict
+JSON_HEADERS = httpx.Headers({"Content-Type": "application/json"})
+
+_SLASH = str.maketrans({"/": "_"})
+
+
+@functools.lru_cache(maxsize=None)
+def load_fixtures(fixture_dir: str) -> dict:
+    """Map fixture names in ``fixture_dir`` to their raw JSON bytes
+
+    Every fixture is read once per test session, broken ones are left out
+    so requests for them take the error branch of ``custom_response``.
+    """
+    fixtures = {}
+    for fixture in Path(fixture_dir).glob("*.json"):
+        content = fixture.read_bytes()
+        try:
+            _json.loads(content)
+        except ValueError:
+            continue
+        fixtures[fixture.stem] = content
+    return fixtures
+
+
+def make_custom_response(prefix: str, fixture_dir: str, strip_underscore=False):
+    """Build an ``httpx_mock`` callback answering with JSON fixtures
+
+    The request path without ``prefix``, with ``/`` replaced by ``_``, names
+    the fixture file in ``fixture_dir``. Pass ``strip_underscore`` when paths
+    outside of ``prefix`` map to fixtures without a leading underscore.
+    """
+    fixtures = load_fixtures(fixture_dir)
+
+    def custom_response(request: httpx.Request) -> httpx.Response:
+        path = request.url.path.removeprefix(prefix).translate(_SLASH)
+        if strip_underscore:
+            path = path.lstrip("_")
+        content = fixtures.get(path)
+        if content is None:
+            content = {
+                "errcode": 99999,
+                "errmsg": f"can not find fixture {path}.json in {fixture_dir}",
+            }
+            return httpx.Response(
+                status_code=200, json=content, request=request, headers=JSON_HEADERS
+            )
+        return httpx.Response(
+            status_code=200, content=content, request=request, headers=JSON_HEADERS
+        )
+
+    return custom_response
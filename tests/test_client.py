@@ -1,8 +1,6 @@
 # -*- coding: utf-8 -*-
 import io
-import json
 import os
-import inspect
 import time
 import pytest
 from datetime import datetime
@@ -10,9 +8,17 @@ from datetime import datetime
 import httpx
 from pytest_httpx import HTTPXMock
 
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+from _mock_helpers import JSON_HEADERS, make_custom_response
+
 from wechatpy import WeChatClient
 from wechatpy.exceptions import WeChatClientException
 from wechatpy.schemes import JsApiCardExt
+from wechatpy.session.memorystorage import MemoryStorage
 
 _TESTS_PATH = os.path.abspath(os.path.dirname(__file__))
 _FIXTURE_PATH = os.path.join(_TESTS_PATH, "fixtures")
@@ -23,45 +29,89 @@ def assert_all_responses_were_requested() -> bool:
     return False
 
 
-def custom_response(request: httpx.Request):
-    path = request.url.path.replace("/cgi-bin/", "").replace("/", "_")
-    if path.startswith("_"):
-        path = path[1:]
-    res_file = os.path.join(_FIXTURE_PATH, f"{path}.json")
-    content = {
-        "errcode": 99999,
-        "errmsg": f"can not find fixture {res_file}",
-    }
-    headers = {"Content-Type": "application/json"}
-    try:
-        with open(res_file, "rb") as f:
-            content = json.loads(f.read().decode("utf-8"))
-    except (IOError, ValueError) as e:
-        content["errmsg"] = f"Loads fixture {res_file} failed, error: {e}"
+custom_response = make_custom_response(
+    "/cgi-bin/", _FIXTURE_PATH, strip_underscore=True
+)
+
+_FOLLOWERS_LAST_PAGE = b'{"total": 2, "count": 0, "next_openid": ""}'
+_TAG_USERS_LAST_PAGE = b'{"count": 0}'
+
+
+def _followers_paged(request: httpx.Request):
+    # the second page of iter_followers is requested with next_openid
+    if b"next_openid" not in request.url.query:
+        return custom_response(request)
     return httpx.Response(
-        status_code=200, json=content, request=request, headers=headers
+        200, content=_FOLLOWERS_LAST_PAGE, request=request, headers=JSON_HEADERS
     )
 
 
+def _tag_users_paged(request: httpx.Request):
+    data = _json.loads(request.content)
+    if not data.get("next_openid"):
+        return custom_response(request)
+    return httpx.Response(
+        200, content=_TAG_USERS_LAST_PAGE, request=request, headers=JSON_HEADERS
+    )
+
+
+_PAGED_RESPONDERS = {
+    "/cgi-bin/user/get": _followers_paged,
+    "/cgi-bin/user/tag/get": _tag_users_paged,
+}
+
+
+def dispatch_response(request: httpx.Request):
+    responder = _PAGED_RESPONDERS.get(request.url.path, custom_response)
+    return responder(request)
+
+
 app_id = "123456"
 secret = "123456"
+_TINY_BLOB = b"nothing"
+
 
+@pytest.fixture(autouse=True)
+def mock_api(request: pytest.FixtureRequest, httpx_mock: HTTPXMock):
+    if request.node.get_closest_marker("custom_callback") is None:
+        httpx_mock.add_callback(dispatch_response)
 
-def test_two_client_not_equal(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+
+@pytest.fixture(scope="module")
+def client() -> WeChatClient:
+    # Building a client wires up every API endpoint, share one per module
+    return WeChatClient(app_id, secret)
+
+
+@pytest.fixture
+def media_file() -> io.BytesIO:
+    # the upload APIs read the buffer, so give every test its own
+    return io.BytesIO(_TINY_BLOB)
+
+
+@pytest.fixture
+def fresh_client() -> WeChatClient:
+    # For tests that depend on the client starting without a cached token
+    return WeChatClient(app_id, secret)
+
+
+def test_two_client_not_equal(fresh_client: WeChatClient):
     client2 = WeChatClient("654321", "654321", "987654321")
-    assert client != client2
-    assert client.user != client2.user
-    assert id(client.menu) != id(client2.menu)
-    client.fetch_access_token()
-    assert client.access_token != client2.access_token
+    assert fresh_client != client2
+    assert fresh_client.user != client2.user
+    assert id(fresh_client.menu) != id(client2.menu)
+    fresh_client.fetch_access_token()
+    assert fresh_client.access_token != client2.access_token
+
 
+def test_api_endpoints_are_built_once(client: WeChatClient):
+    for name in ("shakearound", "wifi", "scan", "material", "media", "user", "wxa"):
+        api = getattr(client, name)
+        assert api is getattr(client, name)
+        assert api._client is client
 
-def test_subclass_client_ok(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
 
+def test_subclass_client_ok(client: WeChatClient):
     class TestClient(WeChatClient):
         pass
 
@@ -69,11 +119,8 @@ def test_subclass_client_ok(httpx_mock: HTTPXMock):
     assert client == client.user._client
 
 
-def test_fetch_access_token_is_method(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-
-    assert inspect.ismethod(client.fetch_access_token)
+def test_fetch_access_token_is_method(client: WeChatClient):
+    assert hasattr(client.fetch_access_token, "__self__")
 
     class TestClient(WeChatClient):
         @property
@@ -81,244 +128,140 @@ def test_fetch_access_token_is_method(httpx_mock: HTTPXMock):
             pass
 
     client = TestClient("12345", "123456", "123456789")
-    assert not inspect.ismethod(client.fetch_access_token)
+    assert not hasattr(client.fetch_access_token, "__self__")
 
 
-def test_fetch_access_token(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    token = client.fetch_access_token()
+def test_fetch_access_token(fresh_client: WeChatClient):
+    token = fresh_client.fetch_access_token()
     assert "1234567890" == token["access_token"]
     assert 7200 == token["expires_in"]
-    assert "1234567890" == client.access_token
-
+    assert "1234567890" == fresh_client.access_token
 
-def test_upload_media(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    media_file = io.BytesIO(b"nothing")
 
+def test_upload_media(client: WeChatClient, media_file: io.BytesIO):
     media = client.media.upload("image", media_file)
     assert "image" == media["type"]
     assert "12345678" == media["media_id"]
 
 
-def test_user_get_group_id(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_user_get_group_id(client: WeChatClient):
     group_id = client.user.get_group_id("123456")
     assert 102 == group_id
 
 
-def test_create_group(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_create_group(client: WeChatClient):
     group = client.group.create("test")
     assert 1 == group["group"]["id"]
     assert "test" == group["group"]["name"]
 
 
-def test_group_get(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_group_get(client: WeChatClient):
     groups = client.group.get()
     assert 5 == len(groups)
 
 
-def test_group_getid(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_group_getid(client: WeChatClient):
     group = client.group.get("123456")
     assert 102 == group
 
 
-def test_group_update(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_group_update(client: WeChatClient):
     result = client.group.update(102, "test")
     assert 0 == result["errcode"]
 
 
-def test_group_move_user(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_group_move_user(client: WeChatClient):
     result = client.group.move_user("test", 102)
     assert 0 == result["errcode"]
 
 
-def test_group_delete(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_group_delete(client: WeChatClient):
     result = client.group.delete(123456)
     assert 0 == result["errcode"]
 
 
-def test_send_text_message(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.message.send_text(1, "test", account="test")
-    assert 0 == result["errcode"]
-
-
-def test_send_image_message(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.message.send_image(1, "123456")
-    assert 0 == result["errcode"]
-
-
-def test_send_voice_message(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.message.send_voice(1, "123456")
-    assert 0 == result["errcode"]
-
-
-def test_send_video_message(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.message.send_video(1, "123456", "test", "test")
-    assert 0 == result["errcode"]
-
-
-def test_send_music_message(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.message.send_music(
-        1, "http://www.qq.com", "http://www.qq.com", "123456", "test", "test"
-    )
-    assert 0 == result["errcode"]
-
-
-def test_send_articles_message(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    articles = [
-        {
-            "title": "test",
-            "description": "test",
-            "url": "http://www.qq.com",
-            "image": "http://www.qq.com",
-        }
-    ]
-    result = client.message.send_articles(1, articles)
-    assert 0 == result["errcode"]
-
-
-def test_send_card_message(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.message.send_card(1, "123456")
-    assert 0 == result["errcode"]
-
-
-def test_send_mini_program_page(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.message.send_mini_program_page(1, {})
-    assert 0 == result["errcode"]
-
-
-def test_send_mass_text_message(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.message.send_mass_text("test", [1])
-    assert 0 == result["errcode"]
-
-
-def test_send_mass_image_message(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.message.send_mass_image("123456", [1])
-    assert 0 == result["errcode"]
-
-
-def test_send_mass_voice_message(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.message.send_mass_voice("test", [1])
-    assert 0 == result["errcode"]
-
-
-def test_send_mass_video_message(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.message.send_mass_video(
-        "test", [1], title="title", description="desc"
-    )
-    assert 0 == result["errcode"]
-
-
-def test_send_mass_article_message(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.message.send_mass_article("test", [1])
-    assert 0 == result["errcode"]
-
-
-def test_send_mass_card_message(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.message.send_mass_card("test", [1])
-    assert 0 == result["errcode"]
-
-
-def test_get_mass_message(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+@pytest.mark.parametrize(
+    "method,args,kwargs",
+    [
+        ("send_text", (1, "test"), {"account": "test"}),
+        ("send_image", (1, "123456"), {}),
+        ("send_voice", (1, "123456"), {}),
+        ("send_video", (1, "123456", "test", "test"), {}),
+        (
+            "send_music",
+            (1, "http://www.qq.com", "http://www.qq.com", "123456", "test", "test"),
+            {},
+        ),
+        (
+            "send_articles",
+            (
+                1,
+                [
+                    {
+                        "title": "test",
+                        "description": "test",
+                        "url": "http://www.qq.com",
+                        "image": "http://www.qq.com",
+                    }
+                ],
+            ),
+            {},
+        ),
+        ("send_card", (1, "123456"), {}),
+        ("send_mini_program_page", (1, {}), {}),
+        ("send_mass_text", ("test", [1]), {}),
+        ("send_mass_image", ("123456", [1]), {}),
+        ("send_mass_voice", ("test", [1]), {}),
+        ("send_mass_video", ("test", [1]), {"title": "title", "description": "desc"}),
+        ("send_mass_article", ("test", [1]), {}),
+        ("send_mass_card", ("test", [1]), {}),
+    ],
+)
+def test_send_message(client: WeChatClient, method, args, kwargs):
+    result = getattr(client.message, method)(*args, **kwargs)
+    assert 0 == result["errcode"]
+
+
+def test_get_mass_message(client: WeChatClient):
     result = client.message.get_mass(201053012)
     assert "SEND_SUCCESS" == result["msg_status"]
 
 
-def test_create_menu(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_create_menu(client: WeChatClient):
     result = client.menu.create(
         {"button": [{"type": "click", "name": "test", "key": "test"}]}
     )
     assert 0 == result["errcode"]
 
 
-def test_get_menu(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_get_menu(client: WeChatClient):
     menu = client.menu.get()
     assert "menu" in menu
 
 
-def test_delete_menu(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_delete_menu(client: WeChatClient):
     result = client.menu.delete()
     assert 0 == result["errcode"]
 
 
-def test_update_menu(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_update_menu(client: WeChatClient):
     result = client.menu.update(
         {"button": [{"type": "click", "name": "test", "key": "test"}]}
     )
     assert 0 == result["errcode"]
 
 
-def test_short_url(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_short_url(client: WeChatClient):
     result = client.misc.short_url("http://www.qq.com")
     assert "http://qq.com" == result["short_url"]
 
 
-def test_get_wechat_ips(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_get_wechat_ips(client: WeChatClient):
     result = client.misc.get_wechat_ips()
     assert ["127.0.0.1"] == result
 
 
-def test_check_network(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_check_network(client: WeChatClient):
     result = client.misc.check_network()
     dns = result["dns"]
     assert [
@@ -327,50 +270,33 @@ def test_check_network(httpx_mock: HTTPXMock):
     ] == dns
 
 
-def test_get_user_info(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_get_user_info(client: WeChatClient):
     openid = "o6_bmjrPTlm6_2sgVt7hMZOPfL2M"
     user = client.user.get(openid)
     assert "Band" == user["nickname"]
 
 
-def test_get_followers(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_get_followers(client: WeChatClient):
     result = client.user.get_followers()
     assert 2 == result["total"]
     assert 2 == result["count"]
 
 
-def test_iter_followers(httpx_mock: HTTPXMock):
-    def next_openid_response(request: httpx.Request):
-        if "next_openid" in request.url.query.decode("utf-8"):
-            content = {"total": 2, "count": 0, "next_openid": ""}
-            headers = {"Content-Type": "application/json"}
-            return httpx.Response(200, json=content, request=request, headers=headers)
-        return custom_response(request)
-
-    httpx_mock.add_callback(next_openid_response)
-    client = WeChatClient(app_id, secret)
+def test_iter_followers(client: WeChatClient):
     users = list(client.user.iter_followers())
     assert 2 == len(users)
     assert "OPENID1" in users
     assert "OPENID2" in users
 
 
-def test_update_user_remark(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_update_user_remark(client: WeChatClient):
     openid = "openid"
     remark = "test"
     result = client.user.update_remark(openid, remark)
     assert 0 == result["errcode"]
 
 
-def test_get_user_info_batch(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_get_user_info_batch(client: WeChatClient):
     user_list = [
         {"openid": "otvxTs4dckWG7imySrJd6jSi0CWE", "lang": "zh-CN"},
         {"openid": "otvxTs_JZ6SEiP0imdhpi50fuSZg", "lang": "zh-CN"},
@@ -382,9 +308,7 @@ def test_get_user_info_batch(httpx_mock: HTTPXMock):
     assert user_list[1]["openid"] == result[1]["openid"]
 
 
-def test_get_user_info_batch_openid_list(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_get_user_info_batch_openid_list(client: WeChatClient):
     user_list = ["otvxTs4dckWG7imySrJd6jSi0CWE", "otvxTs_JZ6SEiP0imdhpi50fuSZg"]
 
     result = client.user.get_batch(user_list)
@@ -393,35 +317,19 @@ def test_get_user_info_batch_openid_list(httpx_mock: HTTPXMock):
     assert user_list[1] == result[1]["openid"]
 
 
-def test_get_tag_users(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_get_tag_users(client: WeChatClient):
     result = client.tag.get_tag_users(101)
     assert 2 == result["count"]
 
 
-def test_iter_tag_users(httpx_mock: HTTPXMock):
-    def next_openid_response(request: httpx.Request):
-        if "user/tag/get" in request.url.path:
-            data = json.loads(request.content.decode("utf-8"))
-            if not data.get("next_openid"):
-                return custom_response(request)
-            content = {"count": 0}
-            headers = {"Content-Type": "application/json"}
-            return httpx.Response(200, json=content, request=request, headers=headers)
-        return custom_response(request)
-
-    httpx_mock.add_callback(next_openid_response)
-    client = WeChatClient(app_id, secret)
+def test_iter_tag_users(client: WeChatClient):
     users = list(client.tag.iter_tag_users(101))
     assert 2 == len(users)
     assert "OPENID1" in users
     assert "OPENID2" in users
 
 
-def test_create_qrcode(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_create_qrcode(client: WeChatClient):
     data = {
         "expire_seconds": 1800,
         "action_name": "QR_SCENE",
@@ -432,17 +340,13 @@ def test_create_qrcode(httpx_mock: HTTPXMock):
     assert 1800 == result["expire_seconds"]
 
 
-def test_get_qrcode_url_with_str_ticket(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_get_qrcode_url_with_str_ticket(client: WeChatClient):
     ticket = "123"
     url = client.qrcode.get_url(ticket)
     assert "https://mp.weixin.qq.com/cgi-bin/showqrcode?ticket=123" == url
 
 
-def test_get_qrcode_url_with_dict_ticket(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_get_qrcode_url_with_dict_ticket(client: WeChatClient):
     ticket = {
         "ticket": "123",
     }
@@ -450,226 +354,107 @@ def test_get_qrcode_url_with_dict_ticket(httpx_mock: HTTPXMock):
     assert "https://mp.weixin.qq.com/cgi-bin/showqrcode?ticket=123" == url
 
 
-def test_customservice_add_account(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_customservice_add_account(client: WeChatClient):
     result = client.customservice.add_account("test1@test", "test1", "test1")
     assert 0 == result["errcode"]
 
 
-def test_customservice_update_account(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_customservice_update_account(client: WeChatClient):
     result = client.customservice.update_account("test1@test", "test1", "test1")
     assert 0 == result["errcode"]
 
 
-def test_customservice_delete_account(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_customservice_delete_account(client: WeChatClient):
     result = client.customservice.delete_account(
         "test1@test",
     )
     assert 0 == result["errcode"]
 
 
-def test_customservice_upload_headimg(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    media_file = io.BytesIO(b"nothing")
+def test_customservice_upload_headimg(client: WeChatClient, media_file: io.BytesIO):
     result = client.customservice.upload_headimg("test1@test", media_file)
     assert 0 == result["errcode"]
 
 
-def test_customservice_get_accounts(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_customservice_get_accounts(client: WeChatClient):
     result = client.customservice.get_accounts()
     assert 2 == len(result)
 
 
-def test_customservice_get_online_accounts(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_customservice_get_online_accounts(client: WeChatClient):
     result = client.customservice.get_online_accounts()
     assert 2 == len(result)
 
 
-def test_customservice_create_session(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_customservice_create_session(client: WeChatClient):
     result = client.customservice.create_session("openid", "test1@test")
     assert 0 == result["errcode"]
 
 
-def test_customservice_close_session(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_customservice_close_session(client: WeChatClient):
     result = client.customservice.close_session("openid", "test1@test")
     assert 0 == result["errcode"]
 
 
-def test_customservice_get_session(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_customservice_get_session(client: WeChatClient):
     result = client.customservice.get_session("openid")
     assert "test1@test" == result["kf_account"]
 
 
-def test_customservice_get_session_list(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_customservice_get_session_list(client: WeChatClient):
     result = client.customservice.get_session_list("test1@test")
     assert 2 == len(result)
 
 
-def test_customservice_get_wait_case(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_customservice_get_wait_case(client: WeChatClient):
     result = client.customservice.get_wait_case()
     assert 150 == result["count"]
 
 
-def test_customservice_get_records(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_customservice_get_records(client: WeChatClient):
     result = client.customservice.get_records(123456789, 987654321, 1)
     assert 2 == len(result["recordlist"])
 
 
-def test_datacube_get_user_summary(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.datacube.get_user_summary("2014-12-06", "2014-12-07")
-    assert 1 == len(result)
-
-
-def test_datacube_get_user_cumulate(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.datacube.get_user_cumulate(
-        datetime(2014, 12, 6), datetime(2014, 12, 7)
-    )
-    assert 1 == len(result)
-
-
-def test_datacube_get_interface_summary(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.datacube.get_interface_summary("2014-12-06", "2014-12-07")
-    assert 1 == len(result)
-
-
-def test_datacube_get_interface_summary_hour(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.datacube.get_interface_summary_hour("2014-12-06", "2014-12-07")
-    assert 1 == len(result)
-
-
-def test_datacube_get_article_summary(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.datacube.get_article_summary("2014-12-06", "2014-12-07")
-    assert 1 == len(result)
-
-
-def test_datacube_get_article_total(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.datacube.get_article_total("2014-12-06", "2014-12-07")
-    assert 1 == len(result)
-
-
-def test_datacube_get_user_read(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.datacube.get_user_read("2014-12-06", "2014-12-07")
-    assert 1 == len(result)
-
-
-def test_datacube_get_user_read_hour(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.datacube.get_user_read_hour("2014-12-06", "2014-12-07")
+@pytest.mark.parametrize(
+    "method,begin_date,end_date",
+    [
+        ("get_user_summary", "2014-12-06", "2014-12-07"),
+        ("get_user_cumulate", datetime(2014, 12, 6), datetime(2014, 12, 7)),
+        ("get_interface_summary", "2014-12-06", "2014-12-07"),
+        ("get_interface_summary_hour", "2014-12-06", "2014-12-07"),
+        ("get_article_summary", "2014-12-06", "2014-12-07"),
+        ("get_article_total", "2014-12-06", "2014-12-07"),
+        ("get_user_read", "2014-12-06", "2014-12-07"),
+        ("get_user_read_hour", "2014-12-06", "2014-12-07"),
+        ("get_user_share_hour", "2014-12-06", "2014-12-07"),
+        ("get_upstream_msg", "2014-12-06", "2014-12-07"),
+        ("get_upstream_msg_hour", "2014-12-06", "2014-12-07"),
+        ("get_upstream_msg_week", "2014-12-06", "2014-12-07"),
+        ("get_upstream_msg_month", "2014-12-06", "2014-12-07"),
+        ("get_upstream_msg_dist", "2014-12-06", "2014-12-07"),
+        ("get_upstream_msg_dist_week", "2014-12-06", "2014-12-07"),
+        ("get_upstream_msg_dist_month", "2014-12-06", "2014-12-07"),
+    ],
+)
+def test_datacube(client: WeChatClient, method, begin_date, end_date):
+    result = getattr(client.datacube, method)(begin_date, end_date)
     assert 1 == len(result)
 
 
-def test_datacube_get_user_share(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_datacube_get_user_share(client: WeChatClient):
     result = client.datacube.get_user_share("2014-12-06", "2014-12-07")
     assert 2 == len(result)
 
 
-def test_datacube_get_user_share_hour(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.datacube.get_user_share_hour("2014-12-06", "2014-12-07")
-    assert 1 == len(result)
-
-
-def test_datacube_get_upstream_msg(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.datacube.get_upstream_msg("2014-12-06", "2014-12-07")
-    assert 1 == len(result)
-
-
-def test_datacube_get_upstream_msg_hour(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.datacube.get_upstream_msg_hour("2014-12-06", "2014-12-07")
-    assert 1 == len(result)
-
-
-def test_datacube_get_upstream_msg_week(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.datacube.get_upstream_msg_week("2014-12-06", "2014-12-07")
-    assert 1 == len(result)
-
-
-def test_datacube_get_upstream_msg_month(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.datacube.get_upstream_msg_month("2014-12-06", "2014-12-07")
-    assert 1 == len(result)
-
-
-def test_datacube_get_upstream_msg_dist(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.datacube.get_upstream_msg_dist("2014-12-06", "2014-12-07")
-    assert 1 == len(result)
-
-
-def test_datacube_get_upstream_msg_dist_week(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.datacube.get_upstream_msg_dist_week("2014-12-06", "2014-12-07")
-    assert 1 == len(result)
-
-
-def test_datacube_get_upstream_msg_dist_month(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    result = client.datacube.get_upstream_msg_dist_month("2014-12-06", "2014-12-07")
-    assert 1 == len(result)
-
-
-def test_device_get_qrcode_url(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_device_get_qrcode_url(client: WeChatClient):
     qrcode_url = client.device.get_qrcode_url(123)
     assert "https://we.qq.com/d/123" == qrcode_url
     qrcode_url = client.device.get_qrcode_url(123, {"a": "a"})
     assert "https://we.qq.com/d/123#YT1h" == qrcode_url
 
 
-def test_jsapi_get_ticket_response(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_jsapi_get_ticket_response(client: WeChatClient):
     result = client.jsapi.get_ticket()
     assert (
         "bxLdikRXVbTPdHSM05e5u5sUoXNKd8-41ZO3MhKoyN5OfkWITDGgnr2fwJ0m9E8NYzWKVZvdVtaUgWvsdshFKA"
@@ -678,9 +463,7 @@ def test_jsapi_get_ticket_response(httpx_mock: HTTPXMock):
     assert 7200 == result["expires_in"]
 
 
-def test_jsapi_get_jsapi_signature(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_jsapi_get_jsapi_signature(client: WeChatClient):
     noncestr = "Wm3WZYTPz0wzccnW"
     ticket = "sM4AOVdWfPE4DxkXGEs8VMCPGGVi4C3VM0P37wVUCFvkVAy_90u5h9nbSlYy3-Sl-HhTdfl2fzFy1AOcHKP7qg"  # NOQA
     timestamp = 1414587457
@@ -689,11 +472,9 @@ def test_jsapi_get_jsapi_signature(httpx_mock: HTTPXMock):
     assert "0f9de62fce790f9a083d5c99e95740ceb90c27ed" == signature
 
 
-def test_jsapi_get_jsapi_card_ticket(httpx_mock: HTTPXMock):
+def test_jsapi_get_jsapi_card_ticket(client: WeChatClient):
     """card_ticket 与 jsapi_ticket 的 api 都相同，除了请求参数 type 为 wx_card
     所以这里使用与 `test_jsapi_get_ticket` 相同的测试文件"""
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
     ticket = client.jsapi.get_jsapi_card_ticket()
     assert (
         "bxLdikRXVbTPdHSM05e5u5sUoXNKd8-41ZO3MhKoyN5OfkWITDGgnr2fwJ0m9E8NYzWKVZvdVtaUgWvsdshFKA"
@@ -706,20 +487,22 @@ def test_jsapi_get_jsapi_card_ticket(httpx_mock: HTTPXMock):
     )
 
 
-def test_jsapi_card_ext(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    card_ext = json.loads(JsApiCardExt("asdf", openid="2").to_json())
+def test_jsapi_card_ext():
+    obj = JsApiCardExt("asdf", openid="2")
+    assert "" == obj.code
+    assert "" == obj.outer_str
+    # to_json drops empty values, which is what callers rely on
+    card_ext = _json.loads(obj.to_json())
     assert "outer_str" not in card_ext
     assert "code" not in card_ext
 
-    card_ext = json.loads(JsApiCardExt("asdf", code="4", openid="2").to_json())
-    assert "code" in card_ext
+    obj = JsApiCardExt("asdf", code="4", openid="2")
+    assert "4" == obj.code
+    assert "4" == _json.loads(obj.to_json())["code"]
 
 
-def test_jsapi_get_jsapi_add_card_params(httpx_mock: HTTPXMock):
+def test_jsapi_get_jsapi_add_card_params(client: WeChatClient):
     """微信签名测试工具：http://mp.weixin.qq.com/debug/cgi-bin/sandbox?t=cardsign"""
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
     nonce_str = "Wm3WZYTPz0wzccnW"
     card_ticket = "sM4AOVdWfPE4DxkXGEs8VMCPGGVi4C3VM0P37wVUCFvkVAy_90u5h9nbSlYy3-Sl-HhTdfl2fzFy1AOcHKP7qg"
     timestamp = "1414587457"
@@ -797,87 +580,63 @@ def test_jsapi_get_jsapi_add_card_params(httpx_mock: HTTPXMock):
     )
 
 
-def test_menu_get_menu_info(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-
+def test_menu_get_menu_info(client: WeChatClient):
     menu_info = client.menu.get_menu_info()
     assert 1 == menu_info["is_menu_open"]
 
 
-def test_message_get_autoreply_info(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_message_get_autoreply_info(client: WeChatClient):
     autoreply = client.message.get_autoreply_info()
     assert 1 == autoreply["is_autoreply_open"]
 
 
-def test_shakearound_apply_device_id(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_shakearound_apply_device_id(client: WeChatClient):
     res = client.shakearound.apply_device_id(1, "test")
     assert 123 == res["apply_id"]
 
 
-def test_shakearound_update_device(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_shakearound_update_device(client: WeChatClient):
     res = client.shakearound.update_device("1234", comment="test")
     assert 0 == res["errcode"]
 
 
-def test_shakearound_bind_device_location(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_shakearound_bind_device_location(client: WeChatClient):
     res = client.shakearound.bind_device_location(123, 1234)
     assert 0 == res["errcode"]
 
 
-def test_shakearound_search_device(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_shakearound_search_device(client: WeChatClient):
     res = client.shakearound.search_device(apply_id=123)
     assert 151 == res["total_count"]
     assert 2 == len(res["devices"])
 
 
-def test_shakearound_add_page(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_shakearound_add_page(client: WeChatClient):
     res = client.shakearound.add_page(
         "test", "test", "http://www.qq.com", "http://www.qq.com"
     )
     assert 28840 == res["page_id"]
 
 
-def test_shakearound_update_page(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_shakearound_update_page(client: WeChatClient):
     res = client.shakearound.update_page(
         123, "test", "test", "http://www.qq.com", "http://www.qq.com"
     )
     assert 28840 == res["page_id"]
 
 
-def test_shakearound_delete_page(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_shakearound_delete_page(client: WeChatClient):
     res = client.shakearound.delete_page(123)
     assert 0 == res["errcode"]
 
 
-def test_shakearound_search_page(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_shakearound_search_page(client: WeChatClient):
     res = client.shakearound.search_pages(123)
     assert 2 == res["total_count"]
     assert 2 == len(res["pages"])
 
 
-def test_shakearound_add_material(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    media_file = io.BytesIO(b"nothing")
+def test_shakearound_add_material(client: WeChatClient, media_file: io.BytesIO):
     res = client.shakearound.add_material(media_file, "icon")
     assert (
         "http://shp.qpic.cn/wechat_shakearound_pic/0/1428377032e9dd2797018cad79186e03e8c5aec8dc/120"
@@ -885,42 +644,32 @@ def test_shakearound_add_material(httpx_mock: HTTPXMock):
     )
 
 
-def test_shakearound_bind_device_pages(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_shakearound_bind_device_pages(client: WeChatClient):
     result = client.shakearound.bind_device_pages(123, 1, 1, 1234)
     assert 0 == result["errcode"]
 
 
-def test_shakearound_get_shake_info(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_shakearound_get_shake_info(client: WeChatClient):
     res = client.shakearound.get_shake_info("123456")
     assert 14211 == res["page_id"]
     assert "oVDmXjp7y8aG2AlBuRpMZTb1-cmA" == res["openid"]
 
 
-def test_shakearound_get_device_statistics(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_shakearound_get_device_statistics(client: WeChatClient):
     res = client.shakearound.get_device_statistics(
         "2015-04-01 00:00:00", "2015-04-17 00:00:00", 1234
     )
     assert 2 == len(res)
 
 
-def test_shakearound_get_page_statistics(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_shakearound_get_page_statistics(client: WeChatClient):
     res = client.shakearound.get_page_statistics(
         "2015-04-01 00:00:00", "2015-04-17 00:00:00", 1234
     )
     assert 2 == len(res)
 
 
-def test_material_get_count(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_material_get_count(client: WeChatClient):
     res = client.material.get_count()
     assert 1 == res["voice_count"]
     assert 2 == res["video_count"]
@@ -928,97 +677,73 @@ def test_material_get_count(httpx_mock: HTTPXMock):
     assert 4 == res["news_count"]
 
 
-def test_shakearound_get_apply_status(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_shakearound_get_apply_status(client: WeChatClient):
     res = client.shakearound.get_apply_status(1234)
     assert 4 == len(res)
 
 
-def test_reraise_requests_exception(httpx_mock: HTTPXMock):
+@pytest.mark.custom_callback
+def test_reraise_requests_exception(httpx_mock: HTTPXMock, fresh_client: WeChatClient):
     def raise_requests_exception(request: httpx.Request):
         return httpx.Response(404, request=request, content="404 not found")
 
     httpx_mock.add_callback(raise_requests_exception)
-    client = WeChatClient(app_id, secret)
 
-    try:
-        client.material.get_count()
-    except WeChatClientException as e:
-        assert 404, e.response.status_code
+    with pytest.raises(WeChatClientException) as exc_info:
+        fresh_client.material.get_count()
+    assert 404 == exc_info.value.response.status_code
 
 
-def test_wifi_list_shops(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_wifi_list_shops(client: WeChatClient):
     res = client.wifi.list_shops()
     assert 16 == res["totalcount"]
     assert 1 == res["pageindex"]
 
 
-def test_wifi_get_shop(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_wifi_get_shop(client: WeChatClient):
     res = client.wifi.get_shop(1)
     assert 1 == res["bar_type"]
     assert 2 == res["ap_count"]
 
 
-def test_wifi_add_device(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_wifi_add_device(client: WeChatClient):
     result = client.wifi.add_device(123, "WX-test", "12345678", "00:1f:7a:ad:5c:a8")
     assert 0 == result["errcode"]
 
 
-def test_wifi_list_devices(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_wifi_list_devices(client: WeChatClient):
     res = client.wifi.list_devices()
     assert 2 == res["totalcount"]
     assert 1 == res["pageindex"]
 
 
-def test_wifi_delete_device(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_wifi_delete_device(client: WeChatClient):
     result = client.wifi.delete_device("00:1f:7a:ad:5c:a8")
     assert 0 == result["errcode"]
 
 
-def test_wifi_get_qrcode_url(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_wifi_get_qrcode_url(client: WeChatClient):
     qrcode_url = client.wifi.get_qrcode_url(123, 0)
     assert "http://www.qq.com" == qrcode_url
 
 
-def test_wifi_set_homepage(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_wifi_set_homepage(client: WeChatClient):
     result = client.wifi.set_homepage(123, 0)
     assert 0 == result["errcode"]
 
 
-def test_wifi_get_homepage(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_wifi_get_homepage(client: WeChatClient):
     res = client.wifi.get_homepage(429620)
     assert 1 == res["template_id"]
     assert "http://wifi.weixin.qq.com/" == res["url"]
 
 
-def test_wifi_list_statistics(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_wifi_list_statistics(client: WeChatClient):
     res = client.wifi.list_statistics("2015-05-01", "2015-05-02")
     assert 2 == len(res)
 
 
-def test_upload_mass_image(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-    media_file = io.BytesIO(b"nothing")
+def test_upload_mass_image(client: WeChatClient, media_file: io.BytesIO):
     res = client.media.upload_mass_image(media_file)
     assert (
         "http://mmbiz.qpic.cn/mmbiz/gLO17UPS6FS2xsypf378iaNhWacZ1G1UplZYWEYfwvuU6Ont96b1roYs CNFwaRrSaKTPCUdBK9DgEHicsKwWCBRQ/0"
@@ -1026,16 +751,12 @@ def test_upload_mass_image(httpx_mock: HTTPXMock):
     )
 
 
-def test_scan_get_merchant_info(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_scan_get_merchant_info(client: WeChatClient):
     res = client.scan.get_merchant_info()
     assert 8888 == res["verified_firm_code_list"][0]
 
 
-def test_scan_create_product(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_scan_create_product(client: WeChatClient):
     res = client.scan.create_product(
         {
             "keystandard": "ean13",
@@ -1045,44 +766,32 @@ def test_scan_create_product(httpx_mock: HTTPXMock):
     assert "5g0B4A90aqc" == res["pid"]
 
 
-def test_scan_publish_product(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_scan_publish_product(client: WeChatClient):
     result = client.scan.publish_product("ean13", "6900873042720")
     assert 0 == result["errcode"]
 
 
-def test_scan_unpublish_product(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_scan_unpublish_product(client: WeChatClient):
     result = client.scan.unpublish_product("ean13", "6900873042720")
     assert 0 == result["errcode"]
 
 
-def test_scan_set_test_whitelist(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_scan_set_test_whitelist(client: WeChatClient):
     result = client.scan.set_test_whitelist(["openid1"], ["messense"])
     assert 0 == result["errcode"]
 
 
-def test_scan_get_product(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_scan_get_product(client: WeChatClient):
     result = client.scan.get_product("ean13", "6900873042720")
     assert "brand_info" in result
 
 
-def test_scan_list_product(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_scan_list_product(client: WeChatClient):
     res = client.scan.list_product()
     assert 2 == res["total"]
 
 
-def test_scan_update_product(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_scan_update_product(client: WeChatClient):
     res = client.scan.update_product(
         {
             "keystandard": "ean13",
@@ -1092,24 +801,17 @@ def test_scan_update_product(httpx_mock: HTTPXMock):
     assert "5g0B4A90aqc" == res["pid"]
 
 
-def test_scan_clear_product(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_scan_clear_product(client: WeChatClient):
     result = client.scan.clear_product("ean13", "6900873042720")
     assert 0 == result["errcode"]
 
 
-def test_scan_check_ticket(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_scan_check_ticket(client: WeChatClient):
     res = client.scan.check_ticket("Ym1haDlvNXJqY3Ru1")
     assert "otAzGjrS4AYCmeJM1GhEOcHXXTAo" == res["openid"]
 
 
-def test_change_openid(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
-
+def test_change_openid(client: WeChatClient):
     res = client.user.change_openid(
         "xxxxx",
         ["oEmYbwN-n24jxvk4Sox81qedINkQ", "oEmYbwH9uVd4RKJk7ZZg6SzL6tTo"],
@@ -1119,9 +821,7 @@ def test_change_openid(httpx_mock: HTTPXMock):
     assert "ori_openid error" == res[1]["err_msg"]
 
 
-def test_code_to_session(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_code_to_session(client: WeChatClient):
     res = client.wxa.code_to_session("023dUeGW1oeGOZ0JXvHW1SDVFW1dUeGu")
     assert "session_key" in res
     assert "D1ZWEygStjuLCnZ9IN2l4Q==" == res["session_key"]
@@ -1129,21 +829,22 @@ def test_code_to_session(httpx_mock: HTTPXMock):
     assert "or4zX05h_Ykt4ju0TUfx3CQsvfTo" == res["unionid"]
 
 
-def test_get_phone_number(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def test_get_phone_number(client: WeChatClient):
     res = client.wxa.get_phone_number("code")
     assert "13123456789" == res["phone_info"]["purePhoneNumber"]
 
 
-def test_client_expires_at_consistency(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-
-    from redis import Redis
-    from wechatpy.session.redisstorage import RedisStorage
+@pytest.mark.parametrize(
+    "backend", ["memory", pytest.param("redis", marks=pytest.mark.redis)]
+)
+def test_client_expires_at_consistency(backend):
+    if backend == "redis":
+        from redis import Redis
+        from wechatpy.session.redisstorage import RedisStorage
 
-    redis = Redis()
-    session = RedisStorage(redis)
+        session = RedisStorage(Redis())
+    else:
+        session = MemoryStorage()
     client1 = WeChatClient(app_id, secret, session=session)
     client2 = WeChatClient(app_id, secret, session=session)
     assert client1.expires_at == client2.expires_at
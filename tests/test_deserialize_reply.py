@@ -75,6 +75,24 @@ class DeserializeReplyTestCase(unittest.TestCase):
         reply = create_reply(replies.ArticlesReply, articles=articles)
         self._test_deserialize(reply)
 
+    def test_bytes_reply_deserialize(self):
+        reply = create_reply(replies.TextReply, content="说个中文呗")
+        deserialized = replies.deserialize_reply(reply.render().encode("utf-8"))
+        self.assertTrue(isinstance(deserialized, replies.TextReply))
+        self.assertEqual(reply.render(), deserialized.render())
+
+    def test_doctype_reply_deserialize(self):
+        reply = create_reply(replies.TextReply, content="test")
+        xml = "<!DOCTYPE xml>\n" + reply.render()
+        self.assertEqual(reply.render(), replies.deserialize_reply(xml).render())
+
+    def test_bad_reply_deserialize(self):
+        self.assertRaises(ValueError, replies.deserialize_reply, "<xml><MsgType>")
+        self.assertRaises(ValueError, replies.deserialize_reply, b"<xml><MsgType>")
+        self.assertRaises(
+            ValueError, replies.deserialize_reply, "<xml><Content>x</Content></xml>"
+        )
+
     def _test_deserialize(self, reply):
         xml = reply.render()
         deserialized = replies.deserialize_reply(xml)
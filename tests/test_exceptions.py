@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+import pickle
+
+from wechatpy.exceptions import (
+    InvalidSignatureException,
+    WeChatClientException,
+    WeChatPayException,
+)
+
+
+def test_client_exception_pickle_keeps_fields():
+    e = pickle.loads(pickle.dumps(WeChatClientException(40001, "invalid", "client")))
+    assert 40001 == e.errcode
+    assert "invalid" == e.errmsg
+    assert "client" == e.client
+    assert e.response is None
+
+
+def test_pay_exception_pickle_keeps_fields():
+    e = WeChatPayException("FAIL", "SYSTEMERROR", "error", errcode=1, errmsg="pay")
+    e = pickle.loads(pickle.dumps(e))
+    assert "SYSTEMERROR" == e.result_code
+    assert "Error code: FAIL, message: error. Pay Error code: 1, message: pay" == str(e)
+
+
+def test_invalid_signature_exception_defaults():
+    e = InvalidSignatureException()
+    assert -40001 == e.errcode
+    assert "InvalidSignatureException(-40001, Invalid signature)" == repr(e)
+
+
+def test_exception_str_follows_field_changes():
+    e = WeChatClientException(40001, "invalid")
+    assert "Error code: 40001, message: invalid" == str(e)
+    assert "WeChatClientException(40001, invalid)" == repr(e)
+    e.errmsg = "changed"
+    assert "Error code: 40001, message: changed" == str(e)
+    assert "WeChatClientException(40001, changed)" == repr(e)
@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
 import os
-import json
 
 import pytest
 import httpx
 from pytest_httpx import HTTPXMock
+
+from _mock_helpers import _json, load_fixtures, make_custom_response
+
 from wechatpy.work import WeChatClient
 
 _TESTS_PATH = os.path.abspath(os.path.dirname(__file__))
@@ -16,57 +18,43 @@ def assert_all_responses_were_requested() -> bool:
     return False
 
 
-def custom_response(request: httpx.Request):
-    path = request.url.path.replace("/cgi-bin/", "").replace("/", "_")
-    res_file = os.path.join(_FIXTURE_PATH, f"{path}.json")
-    content = {
-        "errcode": 99999,
-        "errmsg": f"can not find fixture {res_file}",
-    }
-    headers = {"Content-Type": "application/json"}
-    try:
-        with open(res_file, "rb") as f:
-            content = json.loads(f.read().decode("utf-8"))
-    except (IOError, ValueError) as e:
-        content["errmsg"] = f"Loads fixture {res_file} failed, error: {e}"
-    return httpx.Response(
-        status_code=200, json=content, request=request, headers=headers
-    )
+custom_response = make_custom_response("/cgi-bin/", _FIXTURE_PATH)
 
 
 app_id = "123456"
 secret = "123456"
 
 
-def test_ec_addcorptag(httpx_mock: HTTPXMock):
+@pytest.fixture(scope="module")
+def client() -> WeChatClient:
+    return WeChatClient(app_id, secret)
+
+
+def test_ec_addcorptag(httpx_mock: HTTPXMock, client: WeChatClient):
     httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
     tags = [{"name": "大鸟"}, {"name": "小菜"}]
     res = client.external_contact.add_corp_tag(None, "开发1组", 1, tags=tags)
     assert 0 == res["errcode"]
 
 
-def test_ec_edit_corp_tag(httpx_mock: HTTPXMock):
+def test_ec_edit_corp_tag(httpx_mock: HTTPXMock, client: WeChatClient):
     httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
     res = client.external_contact.edit_corp_tag(
         "etm7wjCgAA-DYuu_JX8DrN0EUfa1ycDw", "开发2组", 1
     )
     assert 0 == res["errcode"]
 
 
-def test_ec_del_corp_tag(httpx_mock: HTTPXMock):
+def test_ec_del_corp_tag(httpx_mock: HTTPXMock, client: WeChatClient):
     httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
     res = client.external_contact.del_corp_tag(
         tag_id=["etm7wjCgAAADvErs_p_VhdNdN6-i2zAg"]
     )
     assert 0 == res["errcode"]
 
 
-def test_ec_mark_tag(httpx_mock: HTTPXMock):
+def test_ec_mark_tag(httpx_mock: HTTPXMock, client: WeChatClient):
     httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
     res = client.external_contact.mark_tag(
         "zm",
         "wmm7wjCgAAkLAv_eiVt53eBokOC3_Tww",
@@ -75,17 +63,43 @@ def test_ec_mark_tag(httpx_mock: HTTPXMock):
     assert 0 == res["errcode"]
 
 
-def test_ec_batch_get_by_user(httpx_mock: HTTPXMock):
+def test_ec_batch_get_by_user(httpx_mock: HTTPXMock, client: WeChatClient):
     httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
     res = client.external_contact.batch_get_by_user("rocky")
     assert 0 == res["errcode"]
 
 
-def test_ec_gen_all_by_user(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
-    client = WeChatClient(app_id, secret)
+def paged_get_by_user(request: httpx.Request) -> httpx.Response:
+    """Serve the batch/get_by_user fixture one ``limit``-sized page at a time"""
+    if not request.url.path.endswith("/externalcontact/batch/get_by_user"):
+        return custom_response(request)
+    data = _json.loads(request.content)
+    fixture = load_fixtures(_FIXTURE_PATH)["externalcontact_batch_get_by_user"]
+    contacts = _json.loads(fixture)["external_contact_list"]
+    start = int(data.get("cursor") or 0)
+    end = start + data["limit"]
+    content = {
+        "errcode": 0,
+        "errmsg": "ok",
+        "external_contact_list": contacts[start:end],
+        "next_cursor": str(end) if end < len(contacts) else "",
+    }
+    return httpx.Response(status_code=200, json=content, request=request)
+
+
+@pytest.mark.parametrize("limit,pages", [(1, 2), (2, 1), (50, 1)])
+def test_ec_gen_all_by_user(
+    httpx_mock: HTTPXMock, client: WeChatClient, limit: int, pages: int
+):
+    httpx_mock.add_callback(paged_get_by_user)
     external_contact_list = []
-    for i in client.external_contact.gen_all_by_user("rocky"):
+    for i in client.external_contact.gen_all_by_user("rocky", limit):
         external_contact_list.append(i)
     assert 2 == len(external_contact_list)
+    # one request per page, a bigger limit must not cost extra round trips
+    requests = [
+        r
+        for r in httpx_mock.get_requests()
+        if r.url.path.endswith("/externalcontact/batch/get_by_user")
+    ]
+    assert pages == len(requests)
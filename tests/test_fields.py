@@ -151,6 +151,13 @@ class FieldsTestCase(unittest.TestCase):
         expected = "<ExpiredTime>1442401156</ExpiredTime>"
         self.assertEqual(expected, field.to_xml(content))
 
+    def test_datetime_field_to_xml_aware(self):
+        from wechatpy.fields import DateTimeField
+
+        field = DateTimeField("CreateTime")
+        content = DateTimeField.from_xml("1442401156")
+        self.assertEqual("<CreateTime>1442401156</CreateTime>", field.to_xml(content))
+
     def assertXMLEqual(self, expected, xml):
         expected = xmltodict.unparse(xmltodict.parse(expected))
         xml = xmltodict.unparse(xmltodict.parse(xml))
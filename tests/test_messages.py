@@ -24,6 +24,31 @@ class MessagesTestCase(unittest.TestCase):
         self.assertEqual("user2", msg.target)
         self.assertTrue(isinstance(msg.create_time, datetime))
 
+    def test_message_field_cache(self):
+        from wechatpy.messages import TextMessage
+
+        msg = TextMessage({"CreateTime": 1482048670})
+        self.assertIs(msg.create_time, msg.create_time)
+        self.assertEqual(1482048670, msg.time)
+
+        msg.time = 1482048680
+        self.assertEqual(1482048680, msg.time)
+        self.assertEqual(1482048680, int(msg.create_time.timestamp()))
+
+    def test_message_pickle(self):
+        import pickle
+
+        from wechatpy.messages import TextMessage
+
+        msg = TextMessage({"Content": "test", "CreateTime": 1482048670})
+        self.assertEqual("test", msg.content)
+        self.assertTrue(isinstance(msg.create_time, datetime))
+
+        msg = pickle.loads(pickle.dumps(msg))
+        self.assertEqual("test", msg.content)
+        self.assertEqual(1482048670, msg.time)
+        self.assertTrue(isinstance(msg.create_time, datetime))
+
     def test_text_message(self):
         from wechatpy.messages import TextMessage
 
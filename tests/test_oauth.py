@@ -1,12 +1,14 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import os
-import json
 
 import pytest
 import httpx
 from pytest_httpx import HTTPXMock
 
-from wechatpy import WeChatOAuth
+from _mock_helpers import make_custom_response
+
+from wechatpy import WeChatOAuth, WeChatOAuthAsync
 from wechatpy.exceptions import WeChatClientException
 
 _TESTS_PATH = os.path.abspath(os.path.dirname(__file__))
@@ -18,19 +20,7 @@ def assert_all_responses_were_requested() -> bool:
     return False
 
 
-def custom_response(request: httpx.Request):
-    path = request.url.path[1:].replace("/", "_")
-    res_file = os.path.join(_FIXTURE_PATH, f"{path}.json")
-    content = {"errcode": 99999, "errmsg": f"can not find fixture: {res_file}"}
-    headers = {"Content-Type": "application/json"}
-    try:
-        with open(res_file) as f:
-            content = json.loads(f.read())
-    except (IOError, ValueError):
-        content["errmsg"] = f"Fixture {res_file} json decode error"
-    return httpx.Response(
-        status_code=200, json=content, request=request, headers=headers
-    )
+custom_response = make_custom_response("/", _FIXTURE_PATH)
 
 
 app_id = "123456"
@@ -38,9 +28,13 @@ secret = "123456"
 redirect_uri = "http://localhost"
 
 
-def test_get_authorize_url(httpx_mock: HTTPXMock):
+@pytest.fixture(scope="module")
+def oauth() -> WeChatOAuth:
+    return WeChatOAuth(app_id, secret, redirect_uri)
+
+
+def test_get_authorize_url(httpx_mock: HTTPXMock, oauth: WeChatOAuth):
     httpx_mock.add_callback(custom_response)
-    oauth = WeChatOAuth(app_id, secret, redirect_uri)
     authorize_url = oauth.authorize_url
     assert (
         "https://open.weixin.qq.com/connect/oauth2/authorize?appid=123456&redirect_uri=http%3A%2F%2Flocalhost&response_type=code&scope=snsapi_base#wechat_redirect"
@@ -48,9 +42,8 @@ def test_get_authorize_url(httpx_mock: HTTPXMock):
     )
 
 
-def test_get_qrconnect_url(httpx_mock: HTTPXMock):
+def test_get_qrconnect_url(httpx_mock: HTTPXMock, oauth: WeChatOAuth):
     httpx_mock.add_callback(custom_response)
-    oauth = WeChatOAuth(app_id, secret, redirect_uri)
     url = oauth.qrconnect_url
     assert (
         "https://open.weixin.qq.com/connect/qrconnect?appid=123456&redirect_uri=http%3A%2F%2Flocalhost&response_type=code&scope=snsapi_login#wechat_redirect"
@@ -58,36 +51,112 @@ def test_get_qrconnect_url(httpx_mock: HTTPXMock):
     )
 
 
-def test_fetch_access_token(httpx_mock: HTTPXMock):
-    httpx_mock.add_callback(custom_response)
+def test_authorize_url_follows_state():
     oauth = WeChatOAuth(app_id, secret, redirect_uri)
+    assert oauth.authorize_url.endswith("&scope=snsapi_base#wechat_redirect")
+    oauth.state = "csrf"
+    assert oauth.authorize_url.endswith("&state=csrf#wechat_redirect")
+    oauth.scope = "snsapi_userinfo"
+    assert "&scope=snsapi_userinfo&state=csrf#" in oauth.authorize_url
+
+
+def test_oauth_instances_share_http_client(oauth: WeChatOAuth):
+    assert WeChatOAuth(app_id, secret, redirect_uri)._http is oauth._http
+    http_client = httpx.Client()
+    oauth2 = WeChatOAuth(app_id, secret, redirect_uri, http_client=http_client)
+    assert oauth2._http is http_client
+
+
+def test_shared_http_client_created_once_across_threads(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from wechatpy import oauth as oauth_module
+
+    monkeypatch.setattr(oauth_module, "_shared_http", None)
+    with ThreadPoolExecutor(8) as pool:
+        clients = set(pool.map(lambda _: oauth_module._get_shared_http(), range(32)))
+    assert len(clients) == 1
+    clients.pop().close()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_shared_http_client_not_inherited_by_fork(oauth: WeChatOAuth):
+    pid = os.fork()
+    if pid == 0:
+        child = WeChatOAuth(app_id, secret, redirect_uri)
+        os._exit(0 if child._http is not oauth._http else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+
+
+def test_shared_http_client_keeps_no_cookies(httpx_mock: HTTPXMock, oauth: WeChatOAuth):
+    httpx_mock.add_response(
+        json={"errcode": 0},
+        headers={"Set-Cookie": "session=user1; Domain=api.weixin.qq.com; Path=/"},
+    )
+    oauth.check_access_token("openid", "token")
+    assert not oauth._http.cookies
+
+
+def test_fetch_access_token(httpx_mock: HTTPXMock, oauth: WeChatOAuth):
+    httpx_mock.add_callback(custom_response)
     res = oauth.fetch_access_token("123456")
     assert res["access_token"] == "ACCESS_TOKEN"
 
 
-def test_refresh_access_token(httpx_mock: HTTPXMock):
+def test_refresh_access_token(httpx_mock: HTTPXMock, oauth: WeChatOAuth):
     httpx_mock.add_callback(custom_response)
-    oauth = WeChatOAuth(app_id, secret, redirect_uri)
     res = oauth.refresh_access_token("123456")
     assert res["access_token"] == "ACCESS_TOKEN"
 
 
-def test_get_user_info(httpx_mock: HTTPXMock):
+def test_get_user_info(httpx_mock: HTTPXMock, oauth: WeChatOAuth):
     httpx_mock.add_callback(custom_response)
-    oauth = WeChatOAuth(app_id, secret, redirect_uri)
     oauth.fetch_access_token("123456")
     res = oauth.get_user_info()
     assert res["openid"] == "OPENID"
 
 
-def test_check_access_token(httpx_mock: HTTPXMock):
+def test_check_access_token(httpx_mock: HTTPXMock, oauth: WeChatOAuth):
     httpx_mock.add_callback(custom_response)
-    oauth = WeChatOAuth(app_id, secret, redirect_uri)
     oauth.fetch_access_token("123456")
     res = oauth.check_access_token()
     assert res is True
 
 
+def test_async_oauth(httpx_mock: HTTPXMock):
+    httpx_mock.add_callback(custom_response)
+
+    async def run():
+        oauth = WeChatOAuthAsync(app_id, secret, redirect_uri)
+        res = await oauth.fetch_access_token("123456")
+        assert res["access_token"] == "ACCESS_TOKEN"
+        res = await oauth.get_user_info()
+        assert res["openid"] == "OPENID"
+        assert await oauth.check_access_token()
+
+    asyncio.run(run())
+
+
+def test_async_oauth_closes_own_client(httpx_mock: HTTPXMock):
+    httpx_mock.add_callback(custom_response)
+
+    async def run():
+        async with WeChatOAuthAsync(app_id, secret, redirect_uri) as oauth:
+            await oauth.fetch_access_token("123456")
+        assert oauth._http.is_closed
+
+        http_client = httpx.AsyncClient()
+        async with WeChatOAuthAsync(
+            app_id, secret, redirect_uri, http_client=http_client
+        ) as oauth:
+            assert oauth._http is http_client
+        assert not http_client.is_closed
+        await http_client.aclose()
+
+    asyncio.run(run())
+
+
 def test_reraise_requests_exception(httpx_mock: HTTPXMock):
     def _wechat_api_mock(request: httpx.Request):
         return httpx.Response(status_code=404, content="404 not found")
@@ -13,6 +13,10 @@ class ReplyTestCase(unittest.TestCase):
         self.assertEqual("user2", reply.target)
         self.assertTrue(isinstance(reply.time, int))
 
+        reply = TextReply(time=None)
+        self.assertTrue(isinstance(reply.time, int))
+        self.assertTrue("<CreateTime>None</CreateTime>" not in reply.render())
+
     def test_reply_render(self):
         timestamp = int(time.time())
         reply = TextReply(
@@ -29,6 +33,21 @@ class ReplyTestCase(unittest.TestCase):
         create_time = f"<CreateTime>{timestamp}</CreateTime>"
         self.assertTrue(create_time in r)
 
+    def test_reply_render_after_change(self):
+        reply = TextReply(source="user1", target="user2", content="test")
+        self.assertEqual(reply.render(), reply.render())
+
+        reply.content = "changed"
+        self.assertTrue("<Content><![CDATA[changed]]></Content>" in reply.render())
+        self.assertTrue("<Content><![CDATA[test]]></Content>" not in reply.render())
+
+    def test_reply_custom_attributes(self):
+        reply = TextReply(source="user1", target="user2", type="custom")
+        self.assertTrue("<MsgType><![CDATA[custom]]></MsgType>" in reply.render())
+
+        reply.foo = 1
+        self.assertEqual(1, reply.foo)
+
     def test_image_reply_properties(self):
         from wechatpy.replies import ImageReply
 
@@ -66,6 +85,17 @@ class ReplyTestCase(unittest.TestCase):
         self.assertEqual("123456", reply.media_id)
         self.assertEqual("test", reply.title)
 
+    def test_video_reply_nested_change(self):
+        from wechatpy.replies import VideoReply
+
+        reply = VideoReply(media_id="123456")
+        reply.video["title"] = "test"
+        self.assertTrue("<Title><![CDATA[test]]></Title>" in reply.render())
+
+        reply.source = "user1"
+        self.assertEqual("test", reply.title)
+        self.assertTrue("<Title><![CDATA[test]]></Title>" in reply.render())
+
     def test_music_reply_properties(self):
         from wechatpy.replies import MusicReply
 
@@ -104,6 +134,44 @@ class ReplyTestCase(unittest.TestCase):
         r2 = ArticlesReply()
         self.assertTrue(r1.render() != r2.render())
 
+    def test_add_article_limit(self):
+        from wechatpy.replies import ArticlesReply
+
+        article = {"title": "test", "url": "http://www.qq.com"}
+
+        reply = ArticlesReply()
+        for _ in range(10):
+            reply.add_article(article)
+        self.assertEqual(10, len(reply.articles))
+        self.assertEqual(10, reply.render().count("<item>"))
+        self.assertRaises(AttributeError, reply.add_article, article)
+
+    def test_reply_pickle(self):
+        import pickle
+
+        from wechatpy.replies import (
+            ArticlesReply,
+            ImageReply,
+            MusicReply,
+            TransferCustomerServiceReply,
+            VideoReply,
+            VoiceReply,
+        )
+
+        for reply in (
+            TextReply(source="user1", target="user2", content="test"),
+            ImageReply(image="123456"),
+            VoiceReply(voice="123456"),
+            VideoReply(media_id="123456", title="test"),
+            MusicReply(thumb_media_id="123456", title="test"),
+            ArticlesReply(articles=[{"title": "test", "url": "http://www.qq.com"}]),
+            TransferCustomerServiceReply(source="user1", target="user2"),
+        ):
+            for name in reply._fields:
+                getattr(reply, name)
+            rendered = reply.render()
+            self.assertEqual(rendered, pickle.loads(pickle.dumps(reply)).render())
+
     def test_empty_reply(self):
         from wechatpy.replies import EmptyReply
 
@@ -26,6 +26,32 @@ class UtilityTestCase(unittest.TestCase):
         self.assertTrue(obj.xxx is None)
         obj.xxx = 1
         self.assertEqual(1, obj.xxx)
+        self.assertFalse(hasattr(obj, "__html__"))
+        self.assertRaises(AttributeError, getattr, obj, "__wrapped__")
+
+    def test_parse_xml_matches_xmltodict(self):
+        import xmltodict
+        from wechatpy.utils import parse_xml
+
+        xml = """<xml>
+        <ToUserName><![CDATA[toUser]]></ToUserName>
+        <Empty></Empty>
+        <Attr id="1">text</Attr>
+        <SendPicsInfo><Count>2</Count><PicList>
+        <item><PicMd5Sum><![CDATA[1b5f7c23b5bf75682a53e7b6d163e185]]></PicMd5Sum></item>
+        <item><PicMd5Sum><![CDATA[2b5f7c23b5bf75682a53e7b6d163e185]]></PicMd5Sum></item>
+        </PicList></SendPicsInfo>
+        </xml>"""
+        self.assertEqual(xmltodict.parse(xml), parse_xml(xml))
+        self.assertEqual(xmltodict.parse(xml), parse_xml(xml.encode("utf-8")))
+
+    def test_parse_xml_namespaces_match_xmltodict(self):
+        import xmltodict
+        from wechatpy.utils import parse_xml
+
+        xml = """<xml xmlns:a="urn:a"><a:Tag>1</a:Tag><Plain>2</Plain></xml>"""
+        self.assertEqual(xmltodict.parse(xml), parse_xml(xml))
+        self.assertEqual("1", parse_xml(xml)["xml"]["a:Tag"])
 
     def test_check_signature_should_ok(self):
         token = "test"
@@ -50,6 +76,16 @@ class UtilityTestCase(unittest.TestCase):
             nonce,
         )
 
+    def test_check_signature_matches_signer(self):
+        import itertools
+
+        from wechatpy.utils import WeChatSigner
+
+        for token, timestamp, nonce in itertools.permutations(["b", "a", "c"]):
+            signer = WeChatSigner()
+            signer.add_data(token, timestamp, nonce)
+            check_signature(token, signer.signature, timestamp, nonce)
+
     def test_check_wxa_signature(self):
         from wechatpy.exceptions import InvalidSignatureException
 
@@ -73,6 +109,10 @@ class UtilityTestCase(unittest.TestCase):
         session_key = "GtYYez5b/M5HhT4L7n31gQ=="
         client_signature = "8fde625b7640734a13c071c05d792b5cef21cf89"
         check_wxa_signature(session_key, raw_data, client_signature)
+        # already encoded input is signed as is
+        check_wxa_signature(
+            session_key.encode("utf-8"), raw_data.encode("utf-8"), client_signature
+        )
 
     def test_wechat_card_signer(self):
         from wechatpy.utils import WeChatSigner
@@ -85,6 +125,17 @@ class UtilityTestCase(unittest.TestCase):
 
         self.assertEqual("f7c3bc1d808e04732adf679965ccc34ca7ae3441", signature)
 
+    def test_random_string(self):
+        import string
+
+        from wechatpy.utils import random_string
+
+        self.assertEqual(16, len(random_string()))
+        # longer than the alphabet, characters may repeat
+        value = random_string(100)
+        self.assertEqual(100, len(value))
+        self.assertTrue(set(value) <= set(string.ascii_letters + string.digits))
+
     @pytest.mark.skipif(skip_if_no_cryptography(), reason="cryptography not installed")
     def test_rsa_encrypt_decrypt(self):
         from wechatpy.pay.utils import rsa_encrypt, rsa_decrypt
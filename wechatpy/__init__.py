@@ -9,7 +9,7 @@ from wechatpy.exceptions import (
     WeChatOAuthException,
     WeChatPayException,
 )  # NOQA
-from wechatpy.oauth import WeChatOAuth  # NOQA
+from wechatpy.oauth import WeChatOAuth, WeChatOAuthAsync  # NOQA
 from wechatpy.parser import parse_message  # NOQA
 from wechatpy.pay import WeChatPay  # NOQA
 from wechatpy.replies import create_reply  # NOQA
@@ -6,49 +6,90 @@
     This module defines some useful field types for parse WeChat messages
 """
 
-import time
 from datetime import datetime
-import base64
+import binascii
 import copy
+import functools
+import itertools
+import sys
 from typing import Any, Callable, Optional, Dict, Union, List
 
 from wechatpy.utils import to_text, to_binary, ObjectDict, timezone
 
 default_timezone = timezone("Asia/Shanghai")
 
+# defaults of these types can be shared between messages without copying
+_IMMUTABLE_TYPES = (type(None), bool, int, float, str, bytes)
+
 
 class FieldDescriptor:
-    def __init__(self, field: "BaseField") -> None:
+    def __init__(self, field: "BaseField", name: Optional[str] = None) -> None:
         self.field = field
         self.attr_name = field.name
+        # the attribute name keys the instance cache, fields reading the same
+        # tag may convert differently and the descriptor itself can't be pickled
+        self.cache_key = name or field.name
+        # resolve the converter once instead of on every cache miss
+        converter = field.converter
+        self.converter = converter if callable(converter) else None
+        self.default_is_immutable = isinstance(field.default, _IMMUTABLE_TYPES)
 
     def __get__(self, instance: Any, instance_type: Optional[type] = None) -> Any:
-        if instance is not None:
-            value = instance._data.get(self.attr_name)
-            if value is None:
+        if instance is None:
+            return self.field
+        try:
+            cache = instance._cache
+        except AttributeError:
+            cache = instance._cache = {}
+        try:
+            return cache[self.cache_key]
+        except KeyError:
+            pass
+        value = instance._data.get(self.attr_name)
+        if value is None:
+            if self.default_is_immutable:
+                value = self.field.default
+            else:
+                # store the copy so in-place changes to it are kept
                 value = copy.deepcopy(self.field.default)
                 instance._data[self.attr_name] = value
-            if isinstance(value, dict):
-                value = ObjectDict(value)
-            if (
-                value
-                and not isinstance(value, (dict, list, tuple))
-                and callable(self.field.converter)
-            ):
-                value = self.field.converter(value)
-            return value
-        return self.field
+        # any field may hold a nested element, so the dict check can not be
+        # skipped per field type; the wrapper replaces the stored dict so
+        # changes made through it outlive the cache
+        if isinstance(value, dict):
+            if not isinstance(value, ObjectDict):
+                value = instance._data[self.attr_name] = ObjectDict(value)
+        elif (
+            value
+            and self.converter is not None
+            and not isinstance(value, (list, tuple))
+        ):
+            value = self.converter(value)
+        cache[self.cache_key] = value
+        return value
 
     def __set__(self, instance: Any, value: Any) -> None:
         instance._data[self.attr_name] = value
+        # several fields may read the same key, e.g. ``time`` and ``create_time``
+        try:
+            instance._cache.clear()
+        except AttributeError:
+            pass
 
 
 class BaseField:
     converter: Optional[Callable[..., Any]] = None
 
     def __init__(self, name: str, default: Optional[Any] = None) -> None:
+        # used as the key into message data, interned keys compare by identity
+        name = sys.intern(name)
         self.name = name
         self.default = default
+        # the tag name never changes, build the markup around values once
+        self._open_tag = f"<{name}>"
+        self._close_tag = f"</{name}>"
+        self._cdata_open = f"<{name}><![CDATA["
+        self._cdata_close = f"]]></{name}>"
 
     def to_xml(self, value: Any) -> str:
         raise NotImplementedError()
@@ -68,7 +109,7 @@ class BaseField:
     def add_to_class(self, klass: type, name: str) -> None:
         self.klass = klass
         klass._fields[name] = self
-        setattr(klass, name, FieldDescriptor(self))
+        setattr(klass, name, FieldDescriptor(self, name))
 
 
 class StringField(BaseField):
@@ -76,10 +117,18 @@ class StringField(BaseField):
         return to_text(value)
 
     converter = __to_text
+    # whether ``converter`` is the plain ``to_text`` above, which returns str
+    # values unchanged so ``to_xml`` can skip calling it for them
+    _plain_text = True
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._plain_text = cls.converter is StringField.converter
 
     def to_xml(self, value: Any) -> str:
-        value = self.converter(value)
-        return f"<{self.name}><![CDATA[{value}]]></{self.name}>"
+        if type(value) is not str or not self._plain_text:
+            value = self.converter(value)
+        return f"{self._cdata_open}{value}{self._cdata_close}"
 
     @classmethod
     def from_xml(cls, value: str) -> str:
@@ -91,24 +140,30 @@ class IntegerField(BaseField):
 
     def to_xml(self, value: Any) -> str:
         value = self.converter(value) if value is not None else self.default
-        return f"<{self.name}>{value}</{self.name}>"
+        return f"{self._open_tag}{value}{self._close_tag}"
 
     @classmethod
     def from_xml(cls, value: str) -> int:
         return cls.converter(value)
 
 
+@functools.lru_cache(maxsize=4096)
+def _fromtimestamp(timestamp: int) -> datetime:
+    # datetimes are immutable, messages pushed together share their timestamps
+    return datetime.fromtimestamp(timestamp, tz=default_timezone)
+
+
 class DateTimeField(BaseField):
     def __converter(self, value: Any) -> datetime:
         v = int(value)
-        return datetime.fromtimestamp(v, tz=default_timezone)
+        return _fromtimestamp(v)
 
     converter = __converter
 
     def to_xml(self, value: datetime) -> str:
-        value = time.mktime(datetime.timetuple(value))
-        value = int(value)
-        return f"<{self.name}>{value}</{self.name}>"
+        # naive values are taken as local time, like ``time.mktime`` did
+        value = int(value.timestamp())
+        return f"{self._open_tag}{value}{self._close_tag}"
 
     @classmethod
     def from_xml(cls, value: str) -> datetime:
@@ -120,7 +175,7 @@ class FloatField(BaseField):
 
     def to_xml(self, value: Any) -> str:
         value = self.converter(value) if value is not None else self.default
-        return f"<{self.name}>{value}</{self.name}>"
+        return f"{self._open_tag}{value}{self._close_tag}"
 
     @classmethod
     def from_xml(cls, value: str) -> float:
@@ -129,7 +184,8 @@ class FloatField(BaseField):
 
 class ImageField(StringField):
     def to_xml(self, value: Any) -> str:
-        value = self.converter(value)
+        if type(value) is not str or not self._plain_text:
+            value = self.converter(value)
         return f"""<Image>
         <MediaId><![CDATA[{value}]]></MediaId>
         </Image>"""
@@ -141,7 +197,8 @@ class ImageField(StringField):
 
 class VoiceField(StringField):
     def to_xml(self, value: Any) -> str:
-        value = self.converter(value)
+        if type(value) is not str or not self._plain_text:
+            value = self.converter(value)
         return f"""<Voice>
         <MediaId><![CDATA[{value}]]></MediaId>
         </Voice>"""
@@ -151,18 +208,48 @@ class VoiceField(StringField):
         return value["MediaId"]
 
 
-class VideoField(StringField):
+def _build_templates(tag: str, nodes: tuple) -> tuple:
+    """Precompute the markup for every combination of optional child nodes
+
+    ``nodes`` are ``(key, tag)`` pairs, the first one is required.
+    Returns the optional keys and a dict from the tuple of present optional
+    keys to a template with one positional slot per node.
+    """
+    required, *optional = nodes
+    templates = {}
+    for count in range(len(optional) + 1):
+        for combination in itertools.combinations(optional, count):
+            children = "".join(
+                f"<{child}><![CDATA[{{}}]]></{child}>"
+                for _, child in (required, *combination)
+            )
+            keys = tuple(key for key, _ in combination)
+            templates[keys] = f"<{tag}>{children}</{tag}>"
+    return tuple(key for key, _ in optional), templates
+
+
+class _GroupField(StringField):
+    """A field rendered as an element wrapping CDATA child nodes"""
+
+    _required_key: str
+    _optional_keys: tuple
+    _templates: dict
+
     def to_xml(self, value: Dict[str, Union[str, Dict[str, str]]]) -> str:
-        kwargs = dict(media_id=self.converter(value["media_id"]))
-        content = "<MediaId><![CDATA[{media_id}]]></MediaId>"
-        if "title" in value:
-            kwargs["title"] = self.converter(value["title"])
-            content += "<Title><![CDATA[{title}]]></Title>"
-        if "description" in value:
-            kwargs["description"] = self.converter(value["description"])
-            content += "<Description><![CDATA[{description}]]></Description>"
-        tpl = f"""<Video>{content}</Video>"""
-        return tpl.format(**kwargs)
+        converter = self.converter
+        present = tuple(key for key in self._optional_keys if key in value)
+        return self._templates[present].format(
+            converter(value[self._required_key]),
+            *[converter(value[key]) for key in present],
+        )
+
+
+class VideoField(_GroupField):
+    _required_key = "media_id"
+    _optional_keys, _templates = _build_templates(
+        "Video",
+        (("media_id", "MediaId"), ("title", "Title"), ("description", "Description")),
+    )
 
     @classmethod
     def from_xml(
@@ -176,24 +263,18 @@ class VideoField(StringField):
         return rv
 
 
-class MusicField(StringField):
-    def to_xml(self, value: Dict[str, Union[str, Dict[str, str]]]) -> str:
-        kwargs = dict(thumb_media_id=self.converter(value["thumb_media_id"]))
-        content = "<ThumbMediaId><![CDATA[{thumb_media_id}]]></ThumbMediaId>"
-        if "title" in value:
-            kwargs["title"] = self.converter(value["title"])
-            content += "<Title><![CDATA[{title}]]></Title>"
-        if "description" in value:
-            kwargs["description"] = self.converter(value["description"])
-            content += "<Description><![CDATA[{description}]]></Description>"
-        if "music_url" in value:
-            kwargs["music_url"] = self.converter(value["music_url"])
-            content += "<MusicUrl><![CDATA[{music_url}]]></MusicUrl>"
-        if "hq_music_url" in value:
-            kwargs["hq_music_url"] = self.converter(value["hq_music_url"])
-            content += "<HQMusicUrl><![CDATA[{hq_music_url}]]></HQMusicUrl>"
-        tpl = f"""<Music>{content}</Music>"""
-        return tpl.format(**kwargs)
+class MusicField(_GroupField):
+    _required_key = "thumb_media_id"
+    _optional_keys, _templates = _build_templates(
+        "Music",
+        (
+            ("thumb_media_id", "ThumbMediaId"),
+            ("title", "Title"),
+            ("description", "Description"),
+            ("music_url", "MusicUrl"),
+            ("hq_music_url", "HQMusicUrl"),
+        ),
+    )
 
     @classmethod
     def from_xml(
@@ -211,25 +292,33 @@ class MusicField(StringField):
         return rv
 
 
+_ARTICLE_ITEM = (
+    "<item>"
+    "<Title><![CDATA[{}]]></Title>"
+    "<Description><![CDATA[{}]]></Description>"
+    "<PicUrl><![CDATA[{}]]></PicUrl>"
+    "<Url><![CDATA[{}]]></Url>"
+    "</item>"
+)
+
+
 class ArticlesField(StringField):
     def to_xml(self, articles: List[Dict[str, str]]) -> str:
-        article_count = len(articles)
-        items = []
-        for article in articles:
-            title = self.converter(article.get("title", ""))
-            description = self.converter(article.get("description", ""))
-            image = self.converter(article.get("image", ""))
-            url = self.converter(article.get("url", ""))
-            item = f"""<item>
-            <Title><![CDATA[{title}]]></Title>
-            <Description><![CDATA[{description}]]></Description>
-            <PicUrl><![CDATA[{image}]]></PicUrl>
-            <Url><![CDATA[{url}]]></Url>
-            </item>"""
-            items.append(item)
-        items_str = "\n".join(items)
-        return f"""<ArticleCount>{article_count}</ArticleCount>
-        <Articles>{items_str}</Articles>"""
+        converter = self.converter
+        format_item = _ARTICLE_ITEM.format
+        items_str = "".join(
+            format_item(
+                converter(article.get("title", "")),
+                converter(article.get("description", "")),
+                converter(article.get("image", "")),
+                converter(article.get("url", "")),
+            )
+            for article in articles
+        )
+        return (
+            f"<ArticleCount>{len(articles)}</ArticleCount>"
+            f"<Articles>{items_str}</Articles>"
+        )
 
     @classmethod
     def from_xml(cls, value: Dict[str, List[Dict[str, str]]]) -> List[Dict[str, str]]:
@@ -246,7 +335,8 @@ class ArticlesField(StringField):
 
 class TaskCardField(StringField):
     def to_xml(self, value: Any) -> str:
-        value = self.converter(value)
+        if type(value) is not str or not self._plain_text:
+            value = self.converter(value)
         return f"""<TaskCard>
             <ReplaceName><![CDATA[{value}]]></ReplaceName>
         </TaskCard>"""
@@ -258,14 +348,15 @@ class TaskCardField(StringField):
 
 class Base64EncodeField(StringField):
     def __base64_encode(self, text: str) -> str:
-        return to_text(base64.b64encode(to_binary(text)))
+        data = text.encode("utf-8") if type(text) is str else to_binary(text)
+        return binascii.b2a_base64(data, newline=False).decode("ascii")
 
     converter = __base64_encode
 
 
 class Base64DecodeField(StringField):
     def __base64_decode(self, text: str) -> str:
-        return to_text(base64.b64decode(to_binary(text)))
+        return binascii.a2b_base64(to_binary(text)).decode("utf-8")
 
     converter = __base64_decode
 
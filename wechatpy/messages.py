@@ -7,7 +7,7 @@
 """
 
 import copy
-from typing import Dict, Type
+from typing import Dict, Tuple, Type
 
 from wechatpy.fields import (
     BaseField,
@@ -40,6 +40,9 @@ def register_component_message(msg_type: str):
 class MessageMetaClass(type):
     """Metaclass for all messages"""
 
+    _fields: Dict[str, BaseField]
+    _field_items: Tuple[Tuple[str, BaseField], ...]
+
     def __new__(mcs, name: str, bases: tuple, attrs: dict):
         for b in bases:
             if not hasattr(b, "_fields"):
@@ -49,7 +52,9 @@ class MessageMetaClass(type):
                 if k in attrs:
                     continue
                 if isinstance(v, FieldDescriptor):
-                    attrs[k] = copy.deepcopy(v.field)
+                    # fields are not changed after creation, a shallow copy
+                    # is enough to give this class its own ``klass``
+                    attrs[k] = copy.copy(v.field)
 
         mcs = super().__new__(mcs, name, bases, attrs)
         mcs._fields = {}
@@ -57,12 +62,16 @@ class MessageMetaClass(type):
         for name, field in mcs.__dict__.items():
             if isinstance(field, BaseField):
                 field.add_to_class(mcs, name)
+        # fixed per class, iterated on every render
+        mcs._field_items = tuple(mcs._fields.items())
         return mcs
 
 
 class BaseMessage(metaclass=MessageMetaClass):
     """Base class for all messages and events"""
 
+    __slots__ = ("_data", "_cache")
+
     type: str = "unknown"
     id: IntegerField = IntegerField("MsgId", 0)
     source: StringField = StringField("FromUserName")
@@ -72,6 +81,7 @@ class BaseMessage(metaclass=MessageMetaClass):
 
     def __init__(self, message):
         self._data = message
+        self._cache = {}
 
     def __repr__(self):
         return f"{self.__class__.__name__}({repr(self._data)})"
@@ -200,12 +210,15 @@ class UnknownMessage(BaseMessage):
 class BaseComponentMessage(metaclass=MessageMetaClass):
     """Base class for all component messages and events"""
 
+    __slots__ = ("_data", "_cache")
+
     type: str = "unknown"
     appid: StringField = StringField("AppId")
     create_time: DateTimeField = DateTimeField("CreateTime")
 
     def __init__(self, message):
         self._data = message
+        self._cache = {}
 
     def __repr__(self):
         return f"{self.__class__.__name__}({repr(self._data)})"
@@ -6,14 +6,82 @@
     This module provides OAuth2 library for WeChat
 """
 
+import atexit
 import json
+import os
+import threading
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any, Optional
 from urllib.parse import quote
 import httpx
 from wechatpy.exceptions import WeChatOAuthException
 
+try:
+    import orjson
 
-class WeChatOAuth:
-    """微信公众平台 OAuth 网页授权"""
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
+
+def _dumps(data: dict) -> bytes:
+    if _HAS_ORJSON:
+        try:
+            return orjson.dumps(data)
+        except TypeError:
+            # e.g. non-str keys, let the json module handle them
+            pass
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def _loads(content: bytes) -> dict:
+    if _HAS_ORJSON:
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            # raw control characters or broken UTF-8, which json tolerates
+            pass
+    return json.loads(content.decode("utf-8", "ignore"), strict=False)
+
+
+_shared_http: Optional[httpx.Client] = None
+_shared_http_lock = threading.Lock()
+
+
+def _get_shared_http() -> httpx.Client:
+    # web handlers often build one WeChatOAuth per request, share the
+    # connection pool so they do not pay a new TLS handshake every time.
+    # The client serves every app and user in the process, so it must not
+    # keep cookies from one response for the next request
+    global _shared_http
+    if _shared_http is None:
+        with _shared_http_lock:
+            if _shared_http is None:
+                jar = CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+                _shared_http = httpx.Client(cookies=jar)
+    return _shared_http
+
+
+def _close_shared_http() -> None:
+    if _shared_http is not None:
+        _shared_http.close()
+
+
+def _forget_shared_http() -> None:
+    # a forked child must not talk over the parent's pooled connections,
+    # drop them without closing so the parent's sockets are left alone
+    global _shared_http, _shared_http_lock
+    _shared_http = None
+    _shared_http_lock = threading.Lock()
+
+
+atexit.register(_close_shared_http)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_shared_http)
+
+
+class BaseWeChatOAuth:
+    """URL building and response handling shared by the sync and async clients"""
 
     API_BASE_URL: str = "https://api.weixin.qq.com/"
     OAUTH_BASE_URL: str = "https://open.weixin.qq.com/connect/"
@@ -31,20 +99,19 @@ class WeChatOAuth:
         self.redirect_uri = redirect_uri
         self.scope = scope
         self.state = state
-        self._http = httpx.Client()
+        self._connect_urls: dict = {}
 
-    def _request(self, method: str, url_or_endpoint: str, **kwargs) -> dict:
+    def _prepare_request(self, url_or_endpoint: str, kwargs: dict) -> str:
         if not url_or_endpoint.startswith(("http://", "https://")):
             url = f"{self.API_BASE_URL}{url_or_endpoint}"
         else:
             url = url_or_endpoint
 
         if isinstance(kwargs.get("data", ""), dict):
-            body = json.dumps(kwargs["data"], ensure_ascii=False)
-            body = body.encode("utf-8")
-            kwargs["data"] = body
+            kwargs["data"] = _dumps(kwargs["data"])
+        return url
 
-        res = self._http.request(method=method, url=url, **kwargs)
+    def _handle_result(self, res: httpx.Response) -> dict:
         try:
             res.raise_for_status()
         except httpx.HTTPStatusError as reqe:
@@ -55,7 +122,7 @@ class WeChatOAuth:
                 request=reqe.request,
                 response=reqe.response,
             )
-        result = json.loads(res.content.decode("utf-8", "ignore"), strict=False)
+        result = _loads(res.content)
 
         if "errcode" in result and result["errcode"] != 0:
             errcode = result["errcode"]
@@ -66,89 +133,198 @@ class WeChatOAuth:
 
         return result
 
-    def _get(self, url: str, **kwargs) -> dict:
-        return self._request(method="get", url_or_endpoint=url, **kwargs)
+    def _update_token(self, res: dict) -> None:
+        self.access_token, self.open_id, self.refresh_token, self.expires_in = (
+            res["access_token"],
+            res["openid"],
+            res["refresh_token"],
+            res["expires_in"],
+        )
+
+    def _access_token_params(self, code: str) -> dict:
+        return {
+            "appid": self.app_id,
+            "secret": self.secret,
+            "code": code,
+            "grant_type": "authorization_code",
+        }
+
+    def _refresh_token_params(self, refresh_token: str) -> dict:
+        return {
+            "appid": self.app_id,
+            "grant_type": "refresh_token",
+            "refresh_token": refresh_token,
+        }
+
+    def _user_params(
+        self, openid: Optional[str], access_token: Optional[str], **extra: Any
+    ) -> dict:
+        return {
+            "access_token": access_token or self.access_token,
+            "openid": openid or self.open_id,
+            **extra,
+        }
+
+    def _connect_url(self, endpoint: str, scope: str) -> str:
+        # state is usually a fresh CSRF token per call, so only the part of
+        # the URL before it is kept and rebuilt when one of its inputs changes
+        key = (self.app_id, self.redirect_uri, scope)
+        cached = self._connect_urls.get(endpoint)
+        if cached is not None and cached[0] == key:
+            prefix = cached[1]
+        else:
+            prefix = (
+                f"{self.OAUTH_BASE_URL}{endpoint}?appid={self.app_id}"
+                f"&redirect_uri={quote(self.redirect_uri, safe=b'')}"
+                f"&response_type=code&scope={scope}"
+            )
+            self._connect_urls[endpoint] = (key, prefix)
+        if self.state:
+            return f"{prefix}&state={self.state}#wechat_redirect"
+        return f"{prefix}#wechat_redirect"
 
     @property
     def authorize_url(self) -> str:
-        redirect_uri = quote(self.redirect_uri, safe=b"")
-        url_list = [
-            self.OAUTH_BASE_URL,
-            "oauth2/authorize?appid=",
-            self.app_id,
-            "&redirect_uri=",
-            redirect_uri,
-            "&response_type=code&scope=",
-            self.scope,
-        ]
-        if self.state:
-            url_list.extend(["&state=", self.state])
-        url_list.append("#wechat_redirect")
-        return "".join(url_list)
+        return self._connect_url("oauth2/authorize", self.scope)
 
     @property
     def qrconnect_url(self) -> str:
-        redirect_uri = quote(self.redirect_uri, safe=b"")
-        url_list = [
-            self.OAUTH_BASE_URL,
-            "qrconnect?appid=",
-            self.app_id,
-            "&redirect_uri=",
-            redirect_uri,
-            "&response_type=code&scope=",
-            "snsapi_login",  # scope
-        ]
-        if self.state:
-            url_list.extend(["&state=", self.state])
-        url_list.append("#wechat_redirect")
-        return "".join(url_list)
+        return self._connect_url("qrconnect", "snsapi_login")
+
+
+class WeChatOAuth(BaseWeChatOAuth):
+    """微信公众平台 OAuth 网页授权
+
+    Without ``http_client`` all instances share one ``httpx.Client`` that
+    stores no cookies. A forked child process gets a fresh one on first use.
+    Pass your own client to isolate connections or to configure proxies and
+    timeouts.
+    """
+
+    def __init__(
+        self,
+        app_id: str,
+        secret: str,
+        redirect_uri: str,
+        scope: str = "snsapi_base",
+        state: str = "",
+        http_client: Optional[httpx.Client] = None,
+    ) -> None:
+        super().__init__(app_id, secret, redirect_uri, scope, state)
+        self._http = http_client if http_client is not None else _get_shared_http()
+
+    def _request(self, method: str, url_or_endpoint: str, **kwargs: Any) -> dict:
+        url = self._prepare_request(url_or_endpoint, kwargs)
+        res = self._http.request(method=method, url=url, **kwargs)
+        return self._handle_result(res)
+
+    def _get(self, url: str, **kwargs: Any) -> dict:
+        return self._request(method="get", url_or_endpoint=url, **kwargs)
 
     def fetch_access_token(self, code: str) -> dict:
         res = self._get(
-            "sns/oauth2/access_token",
-            params={
-                "appid": self.app_id,
-                "secret": self.secret,
-                "code": code,
-                "grant_type": "authorization_code",
-            },
+            "sns/oauth2/access_token", params=self._access_token_params(code)
         )
-        self.access_token = res["access_token"]
-        self.open_id = res["openid"]
-        self.refresh_token = res["refresh_token"]
-        self.expires_in = res["expires_in"]
+        self._update_token(res)
         return res
 
     def refresh_access_token(self, refresh_token: str) -> dict:
         res = self._get(
             "sns/oauth2/refresh_token",
-            params={
-                "appid": self.app_id,
-                "grant_type": "refresh_token",
-                "refresh_token": refresh_token,
-            },
+            params=self._refresh_token_params(refresh_token),
         )
-        self.access_token = res["access_token"]
-        self.open_id = res["openid"]
-        self.refresh_token = res["refresh_token"]
-        self.expires_in = res["expires_in"]
+        self._update_token(res)
         return res
 
     def get_user_info(
-        self, openid: str = None, access_token: str = None, lang: str = "zh_CN"
+        self,
+        openid: Optional[str] = None,
+        access_token: Optional[str] = None,
+        lang: str = "zh_CN",
     ) -> dict:
-        openid = openid or self.open_id
-        access_token = access_token or self.access_token
         return self._get(
-            "sns/userinfo",
-            params={"access_token": access_token, "openid": openid, "lang": lang},
+            "sns/userinfo", params=self._user_params(openid, access_token, lang=lang)
         )
 
-    def check_access_token(self, openid: str = None, access_token: str = None) -> bool:
-        openid = openid or self.open_id
-        access_token = access_token or self.access_token
-        res = self._get(
-            "sns/auth", params={"access_token": access_token, "openid": openid}
+    def check_access_token(
+        self, openid: Optional[str] = None, access_token: Optional[str] = None
+    ) -> bool:
+        res = self._get("sns/auth", params=self._user_params(openid, access_token))
+        if res["errcode"] == 0:
+            return True
+        return False
+
+
+class WeChatOAuthAsync(BaseWeChatOAuth):
+    """微信公众平台 OAuth 网页授权，基于 ``httpx.AsyncClient`` 的异步版本
+
+    An ``AsyncClient`` is bound to the event loop it first runs on, so
+    instances do not share one by default. Close the client the instance
+    creates with ``aclose()`` or by using it as an async context manager;
+    a client passed as ``http_client`` is left to its owner to close.
+    """
+
+    def __init__(
+        self,
+        app_id: str,
+        secret: str,
+        redirect_uri: str,
+        scope: str = "snsapi_base",
+        state: str = "",
+        http_client: Optional[httpx.AsyncClient] = None,
+    ) -> None:
+        super().__init__(app_id, secret, redirect_uri, scope, state)
+        self._owns_http = http_client is None
+        self._http = http_client if http_client is not None else httpx.AsyncClient()
+
+    async def aclose(self) -> None:
+        if self._owns_http:
+            await self._http.aclose()
+
+    async def __aenter__(self) -> "WeChatOAuthAsync":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def _request(self, method: str, url_or_endpoint: str, **kwargs: Any) -> dict:
+        url = self._prepare_request(url_or_endpoint, kwargs)
+        res = await self._http.request(method=method, url=url, **kwargs)
+        return self._handle_result(res)
+
+    async def _get(self, url: str, **kwargs: Any) -> dict:
+        return await self._request(method="get", url_or_endpoint=url, **kwargs)
+
+    async def fetch_access_token(self, code: str) -> dict:
+        res = await self._get(
+            "sns/oauth2/access_token", params=self._access_token_params(code)
+        )
+        self._update_token(res)
+        return res
+
+    async def refresh_access_token(self, refresh_token: str) -> dict:
+        res = await self._get(
+            "sns/oauth2/refresh_token",
+            params=self._refresh_token_params(refresh_token),
+        )
+        self._update_token(res)
+        return res
+
+    async def get_user_info(
+        self,
+        openid: Optional[str] = None,
+        access_token: Optional[str] = None,
+        lang: str = "zh_CN",
+    ) -> dict:
+        return await self._get(
+            "sns/userinfo", params=self._user_params(openid, access_token, lang=lang)
+        )
+
+    async def check_access_token(
+        self, openid: Optional[str] = None, access_token: Optional[str] = None
+    ) -> bool:
+        res = await self._get(
+            "sns/auth", params=self._user_params(openid, access_token)
         )
         if res["errcode"] == 0:
             return True
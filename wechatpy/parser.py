@@ -7,12 +7,11 @@
     :copyright: (c) 2014 by messense.
     :license: MIT, see LICENSE for more details.
 """
-import xmltodict
 from typing import Optional, Dict, Any
 
 from wechatpy.messages import MESSAGE_TYPES, UnknownMessage
 from wechatpy.events import EVENT_TYPES
-from wechatpy.utils import to_text
+from wechatpy.utils import parse_xml, to_text
 
 
 def parse_message(xml: str) -> Any:
@@ -24,7 +23,7 @@ def parse_message(xml: str) -> Any:
     """
     if not xml:
         return
-    message: Dict[str, Any] = xmltodict.parse(to_text(xml))["xml"]
+    message: Dict[str, Any] = parse_xml(to_text(xml))["xml"]
     message_type: str = message["MsgType"].lower()
     event_type: Optional[str] = None
     if message_type == "event" or message_type.startswith("device_"):
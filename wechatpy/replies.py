@@ -9,9 +9,10 @@
 """
 
 import time
-import xmltodict
+from xml.parsers.expat import ExpatError
 
 from wechatpy.fields import (
+    BaseField,
     StringField,
     IntegerField,
     ImageField,
@@ -23,12 +24,22 @@ from wechatpy.fields import (
     HardwareField,
 )
 from wechatpy.messages import BaseMessage, MessageMetaClass
-from typing import Dict, Any, Optional, List, Union
+from wechatpy.utils import parse_xml, to_text
+from typing import Dict, Any, Optional, List, Tuple, Union
 
 
 REPLY_TYPES: Dict[str, Any] = {}
 
 
+def _set_child(reply: "BaseReply", name: str, key: str, value: Any) -> None:
+    # write to a copy of the stored dict directly, reading it through the
+    # field descriptor would build and cache an ObjectDict only to store it back
+    child = dict(reply._data.get(name) or ())
+    child[key] = value
+    reply._data[name] = child
+    reply._cache.clear()
+
+
 def register_reply(reply_type: str):
     def register(cls):
         REPLY_TYPES[reply_type] = cls
@@ -40,23 +51,30 @@ def register_reply(reply_type: str):
 class BaseReply(metaclass=MessageMetaClass):
     """Base class for all replies"""
 
+    _fields: Dict[str, BaseField]
+    _field_items: Tuple[Tuple[str, BaseField], ...]
+
     source: StringField = StringField("FromUserName")
     target: StringField = StringField("ToUserName")
-    time: IntegerField = IntegerField("CreateTime", time.time())
+    time: IntegerField = IntegerField("CreateTime")
     type: str = "unknown"
 
     def __init__(self, **kwargs: Any):
         self._data: Dict[str, Any] = {}
+        self._cache: Dict[Any, Any] = {}
         message: Optional[BaseMessage] = kwargs.pop("message", None)
         if message and isinstance(message, BaseMessage):
             if "source" not in kwargs:
                 kwargs["source"] = message.target
             if "target" not in kwargs:
                 kwargs["target"] = message.source
-            if hasattr(message, "agent") and "agent" not in kwargs:
-                kwargs["agent"] = message.agent
-        if "time" not in kwargs:
-            kwargs["time"] = time.time()
+            if "agent" in self._fields and "agent" not in kwargs:
+                # only work account messages have an agent
+                agent = getattr(message, "agent", None)
+                if agent is not None:
+                    kwargs["agent"] = agent
+        if kwargs.get("time") is None:
+            kwargs["time"] = int(time.time())
         for name, value in kwargs.items():
             field = self._fields.get(name)
             if field:
@@ -66,15 +84,13 @@ class BaseReply(metaclass=MessageMetaClass):
 
     def render(self) -> str:
         """Render reply from Python object to XML string"""
-        nodes = []
-        msg_type = f"<MsgType><![CDATA[{self.type}]]></MsgType>"
-        nodes.append(msg_type)
-        for name, field in self._fields.items():
-            value = getattr(self, name, field.default)
-            node_xml = field.to_xml(value)
-            nodes.append(node_xml)
-        data = "\n".join(nodes)
-        return f"<xml>\n{data}\n</xml>"
+        data = "\n".join(
+            [
+                field.to_xml(getattr(self, name, field.default))
+                for name, field in self._field_items
+            ]
+        )
+        return f"<xml>\n<MsgType><![CDATA[{self.type}]]></MsgType>\n{data}\n</xml>"
 
     def __str__(self) -> str:
         return self.render()
@@ -164,9 +180,7 @@ class VideoReply(BaseReply):
 
     @media_id.setter
     def media_id(self, value: str) -> None:
-        video = self.video
-        video["media_id"] = value
-        self.video = video
+        _set_child(self, "Video", "media_id", value)
 
     @property
     def title(self) -> str:
@@ -174,9 +188,7 @@ class VideoReply(BaseReply):
 
     @title.setter
     def title(self, value: str) -> None:
-        video = self.video
-        video["title"] = value
-        self.video = video
+        _set_child(self, "Video", "title", value)
 
     @property
     def description(self) -> str:
@@ -184,9 +196,7 @@ class VideoReply(BaseReply):
 
     @description.setter
     def description(self, value: str) -> None:
-        video = self.video
-        video["description"] = value
-        self.video = video
+        _set_child(self, "Video", "description", value)
 
 
 @register_reply("music")
@@ -206,9 +216,7 @@ class MusicReply(BaseReply):
 
     @thumb_media_id.setter
     def thumb_media_id(self, value: str) -> None:
-        music = self.music
-        music["thumb_media_id"] = value
-        self.music = music
+        _set_child(self, "Music", "thumb_media_id", value)
 
     @property
     def title(self) -> str:
@@ -216,9 +224,7 @@ class MusicReply(BaseReply):
 
     @title.setter
     def title(self, value: str) -> None:
-        music = self.music
-        music["title"] = value
-        self.music = music
+        _set_child(self, "Music", "title", value)
 
     @property
     def description(self) -> str:
@@ -226,9 +232,7 @@ class MusicReply(BaseReply):
 
     @description.setter
     def description(self, value: str) -> None:
-        music = self.music
-        music["description"] = value
-        self.music = music
+        _set_child(self, "Music", "description", value)
 
     @property
     def music_url(self) -> str:
@@ -236,9 +240,7 @@ class MusicReply(BaseReply):
 
     @music_url.setter
     def music_url(self, value: str) -> None:
-        music = self.music
-        music["music_url"] = value
-        self.music = music
+        _set_child(self, "Music", "music_url", value)
 
     @property
     def hq_music_url(self) -> str:
@@ -246,9 +248,7 @@ class MusicReply(BaseReply):
 
     @hq_music_url.setter
     def hq_music_url(self, value: str) -> None:
-        music = self.music
-        music["hq_music_url"] = value
-        self.music = music
+        _set_child(self, "Music", "hq_music_url", value)
 
 
 @register_reply("news")
@@ -263,11 +263,11 @@ class ArticlesReply(BaseReply):
     articles: ArticlesField = ArticlesField("Articles", [])
 
     def add_article(self, article: Dict[str, Any]) -> None:
-        if len(self.articles) == 10:
-            raise AttributeError("Can't add more than 10 articles in an ArticlesReply")
+        # the field hands out the stored list itself, append to it in place
         articles = self.articles
+        if len(articles) >= 10:
+            raise AttributeError("Can't add more than 10 articles in an ArticlesReply")
         articles.append(article)
-        self.articles = articles
 
 
 @register_reply("transfer_customer_service")
@@ -326,13 +326,13 @@ def create_reply(
     r: Optional[BaseReply] = None
     if not reply:
         r = EmptyReply()
+    elif isinstance(reply, str):
+        r = TextReply(message=message, content=reply)
     elif isinstance(reply, BaseReply):
         r = reply
         if message:
             r.source = message.target
             r.target = message.source
-    elif isinstance(reply, str):
-        r = TextReply(message=message, content=reply)
     elif isinstance(reply, (tuple, list)):
         if len(reply) > 10:
             raise AttributeError("Can't add more than 10 articles in an ArticlesReply")
@@ -342,7 +342,7 @@ def create_reply(
     return r
 
 
-def deserialize_reply(xml: str, update_time: bool = False) -> BaseReply:
+def deserialize_reply(xml: Union[str, bytes], update_time: bool = False) -> BaseReply:
     """
     反序列化被动回复
     :param xml: 待反序列化的xml
@@ -354,21 +354,21 @@ def deserialize_reply(xml: str, update_time: bool = False) -> BaseReply:
         return EmptyReply()
 
     try:
-        reply_dict = xmltodict.parse(xml)["xml"]
+        reply_dict = parse_xml(to_text(xml))["xml"]
         msg_type = reply_dict["MsgType"]
-    except (xmltodict.expat.ExpatError, KeyError):
+    except (ExpatError, KeyError):
         raise ValueError("bad reply xml")
-    if msg_type not in REPLY_TYPES:
+    cls = REPLY_TYPES.get(msg_type)
+    if cls is None:
         raise ValueError("unknown reply type")
 
-    cls = REPLY_TYPES[msg_type]
     kwargs = {}
-    for attr, field in cls._fields.items():
+    for attr, field in cls._field_items:
         if field.name in reply_dict:
             str_value = reply_dict[field.name]
             kwargs[attr] = field.from_xml(str_value)
 
     if update_time:
-        kwargs["time"] = time.time()
+        kwargs["time"] = int(time.time())
 
     return cls(**kwargs)
@@ -7,10 +7,13 @@
 """
 
 import string
-import random
+import secrets
 import hashlib
+from xml.etree import ElementTree
+
+import xmltodict
 from dateutil.tz import gettz
-from typing import List, Union, Optional
+from typing import Any, Dict, List, Union, Optional
 from wechatpy.exceptions import InvalidSignatureException
 
 
@@ -20,6 +23,10 @@ class ObjectDict(dict):
     def __getattr__(self, key: str) -> Optional[Union[str, None]]:
         if key in self:
             return self[key]
+        if key.startswith("__"):
+            # special names must miss, or hasattr() and protocol lookups by
+            # copy, pickle and template engines see None as an implementation
+            raise AttributeError(key)
         return None
 
     def __setattr__(self, key: str, value: Union[str, None]) -> None:
@@ -55,13 +62,21 @@ def check_signature(token: str, signature: str, timestamp: str, nonce: str) -> N
     :param timestamp: WeChat callback timestamp sent by WeChat server
     :param nonce: WeChat callback nonce sent by WeChat sever
     """
-    signer = WeChatSigner()
-    signer.add_data(token, timestamp, nonce)
-    if signer.signature != signature:
+    # same result as WeChatSigner, sorting three values needs no list
+    a, b, c = to_binary(token), to_binary(timestamp), to_binary(nonce)
+    if a > b:
+        a, b = b, a
+    if b > c:
+        b, c = c, b
+    if a > b:
+        a, b = b, a
+    if hashlib.sha1(a + b + c).hexdigest() != signature:
         raise InvalidSignatureException()
 
 
-def check_wxa_signature(session_key: str, raw_data: str, client_signature: str) -> None:
+def check_wxa_signature(
+    session_key: Union[str, bytes], raw_data: Union[str, bytes], client_signature: str
+) -> None:
     """校验前端传来的rawData签名正确
     详情请参考
     https://developers.weixin.qq.com/miniprogram/dev/framework/open-ability/signature.html # noqa
@@ -72,7 +87,7 @@ def check_wxa_signature(session_key: str, raw_data: str, client_signature: str)
     :raises: InvalidSignatureException
     :return: 返回数据dict
     """
-    str2sign = (raw_data + session_key).encode("utf-8")
+    str2sign = to_binary(raw_data) + to_binary(session_key)
     signature = hashlib.sha1(str2sign).hexdigest()
     if signature != client_signature:
         raise InvalidSignatureException()
@@ -84,6 +99,12 @@ def to_text(value: Union[str, bytes], encoding: str = "utf-8") -> str:
     :param value: Value to be converted
     :param encoding: Desired encoding
     """
+    # plain str and bytes first, empty ones convert to "" on their own;
+    # the isinstance checks below handle subclasses
+    if type(value) is str:
+        return value
+    if type(value) is bytes:
+        return value.decode(encoding)
     if not value:
         return ""
     if isinstance(value, str):
@@ -99,6 +120,10 @@ def to_binary(value: Union[str, bytes], encoding: str = "utf-8") -> bytes:
     :param value: Value to be converted
     :param encoding: Desired encoding
     """
+    if type(value) is bytes:
+        return value
+    if type(value) is str:
+        return value.encode(encoding)
     if not value:
         return b""
     if isinstance(value, bytes):
@@ -117,7 +142,63 @@ def timezone(zone: str) -> Optional[object]:
     return gettz(zone)
 
 
+_RANDOM_CHARS = (string.ascii_letters + string.digits).encode()
+# maps a random byte to a character, bytes from 248 (4 * 62) up are dropped
+# so that every character is equally likely
+_RANDOM_TABLE = bytes(_RANDOM_CHARS[b % 62] for b in range(248)) + bytes(8)
+_RANDOM_DROP = bytes(range(248, 256))
+
+
 def random_string(length: int = 16) -> str:
-    rule = string.ascii_letters + string.digits
-    rand_list = random.sample(rule, length)
-    return "".join(rand_list)
+    """Generate a random string of ASCII letters and digits using ``secrets``
+
+    :param length: length of the string
+    """
+    chars = bytearray()
+    while len(chars) < length:
+        chars += secrets.token_bytes(length).translate(_RANDOM_TABLE, _RANDOM_DROP)
+    return chars[:length].decode()
+
+
+def _element_to_dict(element: ElementTree.Element) -> Any:
+    text = element.text
+    if len(element):
+        # character data between children is joined, as xmltodict does
+        text = "".join([text or ""] + [child.tail or "" for child in element])
+    text = text.strip() or None if text else None
+    if not len(element) and not element.attrib:
+        return text
+    result: Dict[str, Any] = {f"@{key}": value for key, value in element.attrib.items()}
+    for child in element:
+        value = _element_to_dict(child)
+        existing = result.get(child.tag, result)
+        if existing is result:
+            result[child.tag] = value
+        elif isinstance(existing, list):
+            existing.append(value)
+        else:
+            result[child.tag] = [existing, value]
+    if text is not None:
+        result["#text"] = text
+    return result
+
+
+def parse_xml(xml: Union[str, bytes]) -> Dict[str, Any]:
+    """Parse XML into the same structure ``xmltodict.parse`` returns
+
+    The document is built with the C ElementTree parser. Documents with a
+    DOCTYPE or namespaces, and malformed ones, are handed to ``xmltodict``
+    instead: entities stay disabled, prefixed tags and ``@xmlns`` attributes
+    keep xmltodict's form and errors still raise ``ExpatError``.
+
+    :param xml: XML document
+    :return: ``{root_tag: content}``
+    """
+    xml = to_text(xml)
+    if "<!DOCTYPE" in xml or "xmlns" in xml:
+        return xmltodict.parse(xml)
+    try:
+        root = ElementTree.fromstring(xml)
+    except ElementTree.ParseError:
+        return xmltodict.parse(xml)
+    return {root.tag: _element_to_dict(root)}
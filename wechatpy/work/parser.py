@@ -1,18 +1,16 @@
 # -*- coding: utf-8 -*-
 
 
-import xmltodict
-
 from wechatpy.work.events import EVENT_TYPES
 from wechatpy.work.messages import MESSAGE_TYPES
 from wechatpy.messages import UnknownMessage
-from wechatpy.utils import to_text
+from wechatpy.utils import parse_xml, to_text
 
 
 def parse_message(xml):
     if not xml:
         return
-    message = xmltodict.parse(to_text(xml))["xml"]
+    message = parse_xml(to_text(xml))["xml"]
     message_type = message["MsgType"].lower()
     if message_type == "event":
         event_type = message["Event"].lower()
@@ -62,14 +62,15 @@ class TaskCardReply(replies.BaseReply):
 
 def create_reply(reply, message=None, render=False):
     r = None
-    if isinstance(reply, replies.BaseReply):
+    if isinstance(reply, str):
+        r = TextReply(message=message, content=reply)
+    elif isinstance(reply, replies.BaseReply):
         r = reply
         if message:
             r.source = message.target
             r.target = message.source
-            r.agent = message.agent
-    elif isinstance(reply, str):
-        r = TextReply(message=message, content=reply)
+            if "agent" in r._fields:
+                r.agent = message.agent
     elif isinstance(reply, (tuple, list)):
         if len(reply) > 10:
             raise AttributeError("Can't add more than 10 articles in an ArticlesReply")